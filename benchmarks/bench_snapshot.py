@@ -0,0 +1,45 @@
+"""Compares snapshot()/restore() and clone() against copy.deepcopy for trying a move.
+
+Run with ``python -m benchmarks.bench_snapshot``.
+"""
+import copy
+import timeit
+
+from scoundrel_game.game_engine import GameState
+
+
+def mid_game(seed: int = 7, moves: int = 12) -> GameState:
+    game = GameState(seed)
+    for _ in range(moves):
+        if not game.legal_actions() or game.is_game_over()["over"]:
+            break
+        game.play(*game.legal_actions()[0])
+    return game
+
+
+def try_move_deepcopy(game: GameState) -> None:
+    trial = copy.deepcopy(game)
+    trial.play(*trial.legal_actions()[0])
+
+
+def try_move_clone(game: GameState) -> None:
+    trial = game.clone()
+    trial.play(*trial.legal_actions()[0])
+
+
+def try_move_snapshot(game: GameState) -> None:
+    mark = game.snapshot()
+    game.play(*game.legal_actions()[0])
+    game.restore(mark)
+
+
+def main(number: int = 20000) -> None:
+    game = mid_game()
+    for name, fn in (("deepcopy", try_move_deepcopy), ("clone", try_move_clone),
+                     ("snapshot/restore", try_move_snapshot)):
+        seconds = min(timeit.repeat(lambda: fn(game), number=number, repeat=3))
+        print(f"{name:>18}: {seconds / number * 1e6:8.2f} us per try-and-rollback")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""Load test for scoundrel_game.server: many concurrent WebSocket players.
+
+Run ``python -m benchmarks.load_server --clients 5000 --concurrency 500``. It
+starts the server in a subprocess, plays every client's game over its own
+WebSocket, and reports move latency percentiles plus sessions per GB of server
+memory. Add ``--streamlit 50`` to time that many clicks in scoundrel_app.py,
+served by ``streamlit run`` and driven over its WebSocket, for comparison.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+from websockets.asyncio.client import connect
+
+from benchmarks.suite import APP_PATH
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _rss_bytes(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    raise RuntimeError("VmRSS not found; sessions per GB needs Linux /proc.")
+
+
+def _cpu_seconds(pid: int) -> float:
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    if not ordered:
+        return {}
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+    return {"p50_ms": pick(0.50), "p95_ms": pick(0.95), "p99_ms": pick(0.99), "max_ms": ordered[-1] * 1000}
+
+
+async def _client(url: str, moves: int, rng: random.Random, latencies: List[float]) -> None:
+    async with connect(url, max_size=None) as ws:
+        legal = json.loads(await ws.recv())["state"]["legal"]
+        for _ in range(moves):
+            if not legal:
+                break
+            action, index = rng.choice(legal)
+            started = time.perf_counter()
+            await ws.send(json.dumps({"action": action, "index": index}))
+            diff = json.loads(await ws.recv())["diff"]
+            latencies.append(time.perf_counter() - started)
+            legal = diff.get("legal", legal)
+            if diff.get("over"):
+                break
+
+
+async def _drive(url: str, clients: int, concurrency: int, moves: int, seed: int) -> List[float]:
+    latencies: List[float] = []
+    gate = asyncio.Semaphore(concurrency)
+    rng = random.Random(seed)
+
+    async def one(i: int) -> None:
+        async with gate:
+            await _client(url, moves, random.Random(rng.getrandbits(32) ^ i), latencies)
+
+    await asyncio.gather(*(one(i) for i in range(clients)))
+    return latencies
+
+
+def _drive_process(url: str, clients: int, concurrency: int, moves: int, seed: int) -> List[float]:
+    return asyncio.run(_drive(url, clients, concurrency, moves, seed))
+
+
+def run_server_load(clients: int, concurrency: int, moves: int, seed: int = 0,
+                    processes: int = 1) -> Dict[str, float]:
+    """Plays clients games against a fresh server, split over processes so the clients are not the bottleneck."""
+    port = _free_port()
+    server = subprocess.Popen([sys.executable, "-m", "scoundrel_game.server", "--port", str(port),
+                               "--max-live", str(max(clients, 10000))])
+    try:
+        for _ in range(100):
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/healthz").read()
+                break
+            except OSError:
+                time.sleep(0.1)
+        rss_before, cpu_before = _rss_bytes(server.pid), _cpu_seconds(server.pid)
+        started = time.perf_counter()
+        url = f"ws://127.0.0.1:{port}/ws"
+        with ProcessPoolExecutor(processes) as pool:
+            shares = [pool.submit(_drive_process, url, len(range(p, clients, processes)),
+                                  max(1, concurrency // processes), moves, seed + p) for p in range(processes)]
+            latencies = [latency for share in shares for latency in share.result()]
+        elapsed = time.perf_counter() - started
+        grown = max(1, _rss_bytes(server.pid) - rss_before)
+        cpu = _cpu_seconds(server.pid) - cpu_before
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/healthz") as f:
+            live = json.load(f)["live"]
+    finally:
+        server.terminate()
+        server.wait()
+    return dict(_percentiles(latencies), clients=clients, moves=len(latencies), seconds=elapsed,
+                moves_per_s=len(latencies) / elapsed, server_cpu_s=cpu, live_sessions=live,
+                sessions_per_gb=live / grown * 1e9)
+
+
+async def _streamlit_clicks(port: int, clicks: int, seed: int) -> Dict[str, List[float]]:
+    """Clicks random enabled buttons over Streamlit's own WebSocket protocol, as a browser would."""
+    from streamlit.proto.BackMsg_pb2 import BackMsg
+    from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+    rng = random.Random(seed)
+    buttons: Dict[str, tuple] = {}  # element path -> (widget id, label, disabled, fragment id)
+    cached: List[str] = []
+    samples: Dict[str, List[float]] = {"latencies": [], "bytes": [], "deltas": []}
+    async with connect(f"ws://127.0.0.1:{port}/_stcore/stream", max_size=None) as ws:
+        async def rerun(widget_id: str = "", fragment_id: str = "") -> None:
+            back = BackMsg()
+            back.rerun_script.fragment_id = fragment_id
+            back.rerun_script.cached_message_hashes.extend(cached)
+            if widget_id:
+                widget = back.rerun_script.widget_states.widgets.add()
+                widget.id, widget.trigger_value = widget_id, True
+            for path in [p for p, button in buttons.items() if not fragment_id or button[3] == fragment_id]:
+                del buttons[path]
+            started, size, deltas = time.perf_counter(), 0, 0
+            await ws.send(back.SerializeToString())
+            while True:
+                raw = await ws.recv()
+                size += len(raw)
+                msg = ForwardMsg()
+                msg.ParseFromString(raw)
+                if msg.metadata.cacheable:
+                    cached.append(msg.hash)
+                kind = msg.WhichOneof("type")
+                if kind == "new_session":
+                    buttons.clear()
+                elif kind == "delta":
+                    deltas += 1
+                    element = msg.delta.new_element
+                    if msg.delta.WhichOneof("type") == "new_element" and element.WhichOneof("type") == "button":
+                        buttons[str(list(msg.metadata.delta_path))] = (
+                            element.button.id, element.button.label, element.button.disabled, msg.delta.fragment_id)
+                elif kind == "script_finished" and msg.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    break
+            if widget_id:
+                samples["latencies"].append(time.perf_counter() - started)
+                samples["bytes"].append(size)
+                samples["deltas"].append(deltas)
+
+        await rerun()
+        for _ in range(clicks):
+            live = {button[0]: button for button in buttons.values()
+                    if not button[2] and button[1] not in ("Ask for a Hint", "Refresh Hint", "Stop Thinking")}
+            if not live:
+                break
+            widget_id, _, _, fragment_id = rng.choice(sorted(live.values()))
+            await rerun(widget_id, fragment_id)
+    return samples
+
+
+def run_streamlit_clicks(clicks: int, seed: int = 0) -> Dict[str, float]:
+    """Times clicks in scoundrel_app.py served by a real `streamlit run`, with the bytes each one sends."""
+    port = _free_port()
+    server = subprocess.Popen([sys.executable, "-m", "streamlit", "run", APP_PATH, "--server.headless", "true",
+                               "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+                              cwd=os.path.dirname(APP_PATH), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        for _ in range(300):
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health").read()
+                break
+            except OSError:
+                time.sleep(0.1)
+        samples = asyncio.run(_streamlit_clicks(port, clicks, seed))
+    finally:
+        server.terminate()
+        server.wait()
+    clicked = len(samples["latencies"])
+    return dict(_percentiles(samples["latencies"]), clicks=clicked,
+                bytes_per_click=sum(samples["bytes"]) / max(1, clicked),
+                deltas_per_click=sum(samples["deltas"]) / max(1, clicked))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Load test the Scoundrel game server.")
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=500, help="Clients connected at once.")
+    parser.add_argument("--moves", type=int, default=30, help="Moves per client, at most.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--processes", type=int, default=1, help="Client processes to spread the clients over.")
+    parser.add_argument("--streamlit", type=int, default=0, metavar="CLICKS",
+                        help="Also time this many clicks in the Streamlit app.")
+    parser.add_argument("--json", metavar="PATH", help="Write the results as JSON.")
+    args = parser.parse_args(argv)
+
+    results = {"server": run_server_load(args.clients, args.concurrency, args.moves, args.seed,
+                                         args.processes)}
+    if args.streamlit:
+        results["streamlit"] = run_streamlit_clicks(args.streamlit, args.seed)
+    for name, metrics in results.items():
+        print(f"{name}: " + ", ".join(f"{key} {value:.2f}" if isinstance(value, float) else f"{key} {value}"
+                                      for key, value in metrics.items()))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,226 @@
+"""Benchmark suite for the engine hot paths, simulation throughput and app reruns.
+
+Run ``python -m benchmarks.suite --json results.json`` to record a run and
+``python -m benchmarks.suite --baseline results.json`` to compare against it;
+the exit status is 1 if any metric regressed by more than --tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import timeit
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+
+from scoundrel_game.codec import encode_game
+from scoundrel_game.game_engine import GameState
+from scoundrel_game.simulate import play_chunk
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scoundrel_app.py")
+
+# name -> (value, unit); every metric is lower-is-better except those in HIGHER_IS_BETTER.
+Metrics = Dict[str, Tuple[float, str]]
+HIGHER_IS_BETTER = ("games_per_s",)
+
+
+def _positions(count: int, seeds: int = 400) -> List[GameState]:
+    """Every position reached by weapon-first play on the first seeds, capped at count."""
+    positions = []
+    for seed in range(seeds):
+        game = GameState(seed)
+        while not game.is_game_over()["over"] and game.legal_actions() and len(positions) < count:
+            positions.append(game.clone())
+            actions = game.legal_actions()
+            game.play(*next((a for a in actions if a[0] == "fight_weapon"), actions[0]))
+    return positions
+
+
+def _per_call(fn: Callable[[], None], repeat: int) -> float:
+    """Best of repeat runs, each long enough (about 0.2s) to drown out timer noise."""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e6
+
+
+def _per_position(positions: List[Tuple[GameState, Optional[int]]], apply: Callable[[GameState, Optional[int]], None],
+                  repeat: int) -> float:
+    """Microseconds per call of apply(game, index), each call on its own fresh clone of a position."""
+    best = None
+    for _ in range(repeat):
+        games = [(game.clone(), index) for game, index in positions]
+        started = time.perf_counter()
+        for game, index in games:
+            apply(game, index)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best / len(positions) * 1e6
+
+
+def bench_operations(scale: float) -> Metrics:
+    repeat = 7
+    positions = _positions(max(500, int(5000 * scale)))
+    game = positions[len(positions) // 2]
+
+    def legal_actions() -> None:
+        game._mask = None
+        game.legal_actions()
+
+    metrics: Metrics = {
+        "op.construct_us": (_per_call(lambda: GameState(7), repeat), "us"),
+        "op.construct_silent_us": (_per_call(lambda: GameState(7, silent=True), repeat), "us"),
+        "op.build_deck_us": (_per_call(game._build_deck, repeat), "us"),
+        "op.is_game_over_us": (_per_call(game.is_game_over, repeat), "us"),
+        "op.legal_actions_us": (_per_call(legal_actions, repeat), "us"),
+        "op.position_hash_us": (_per_call(game.position_hash, repeat), "us"),
+        "op.rehash_us": (_per_call(game.rehash, repeat), "us"),
+    }
+
+    def draw(g: GameState, index: None) -> None:
+        del g.room[1:]
+        g.draw_room()
+
+    # The action methods themselves: the move's room index is found before timing, and play()'s
+    # dispatch and any installed hooks are left out.
+    cases = (("fight_monster", "fight", lambda g, i: g.fight_monster(i)),
+             ("fight_monster_weapon", "fight_weapon", lambda g, i: g.fight_monster(i, use_weapon=True)),
+             ("equip_weapon", "equip", lambda g, i: g.equip_weapon(i)),
+             ("drink_potion", "drink", lambda g, i: g.drink_potion(i)),
+             ("sell_to_merchant", "sell", lambda g, i: g.sell_to_merchant(i)),
+             ("run_from_room", "run", lambda g, i: g.run_from_room()))
+    for name, action, apply in cases:
+        legal = [(g, next(i for a, i in g.legal_actions() if a == action)) for g in positions
+                 if any(a == action for a, _ in g.legal_actions())]
+        if legal:
+            metrics[f"op.{name}_us"] = (_per_position(legal, apply, repeat), "us")
+    with_deck = [(g, None) for g in positions if g.deck]
+    metrics["op.draw_room_us"] = (_per_position(with_deck, draw, repeat), "us")
+    return metrics
+
+
+def bench_throughput(scale: float) -> Metrics:
+    metrics: Metrics = {}
+    games = max(200, int(3000 * scale))
+    engines = ["python"]
+    try:
+        import numpy  # noqa: F401
+        engines.append("numpy")
+    except ImportError:
+        pass
+    for engine in engines:
+        for policy in ("greedy", "weapon", "random"):
+            if engine == "numpy" and policy == "random":
+                continue
+            started = time.perf_counter()
+            play_chunk(0, games, policy, engine=engine)
+            metrics[f"sim.{engine}.{policy}.games_per_s"] = (games / (time.perf_counter() - started), "games/s")
+    return metrics
+
+
+def _live_bytes(make: Callable[[], object], count: int) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    live = [make() for _ in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del live
+    return (after - before) / count
+
+
+def bench_memory(scale: float) -> Metrics:
+    count = max(100, int(1000 * scale))
+    game = _positions(200)[100]
+    return {
+        "mem.game_state_bytes": (_live_bytes(GameState, count), "bytes"),
+        "mem.game_state_mid_game_bytes": (_live_bytes(game.clone, count), "bytes"),
+        "mem.token_bytes": (float(len(encode_game(game))), "bytes"),
+    }
+
+
+def bench_app(scale: float) -> Metrics:
+    try:
+        from streamlit.testing.v1 import AppTest
+    except ImportError:
+        return {}
+    app = AppTest.from_file(APP_PATH, default_timeout=60)
+    started = time.perf_counter()
+    app.run()
+    first = time.perf_counter() - started
+    reruns = []
+    for _ in range(max(3, int(10 * scale))):
+        started = time.perf_counter()
+        app.run()
+        reruns.append(time.perf_counter() - started)
+    if app.exception:
+        raise RuntimeError(f"scoundrel_app.py raised: {app.exception}")
+    return {"app.first_run_ms": (first * 1000, "ms"), "app.rerun_ms": (min(reruns) * 1000, "ms")}
+
+
+BENCHMARKS: Dict[str, Callable[[float], Metrics]] = {
+    "operations": bench_operations,
+    "throughput": bench_throughput,
+    "memory": bench_memory,
+    "app": bench_app,
+}
+
+
+def compare(results: Metrics, baseline: Metrics, tolerance: float) -> List[str]:
+    """Names of the metrics that got worse than the baseline by more than tolerance."""
+    regressions = []
+    for name, (value, _) in results.items():
+        if name not in baseline or not baseline[name][0]:
+            continue
+        change = value / baseline[name][0] - 1
+        if name.endswith(HIGHER_IS_BETTER):
+            change = -change
+        if change > tolerance:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the Scoundrel engine, simulator and app.")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="Run a subset of the groups.")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier on iteration counts.")
+    parser.add_argument("--json", metavar="PATH", help="Write the results as JSON.")
+    parser.add_argument("--baseline", metavar="PATH", help="Compare against a JSON file from an earlier run.")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="Relative slowdown that counts as a regression (default 0.15).")
+    args = parser.parse_args(argv)
+
+    baseline: Optional[Metrics] = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = {name: tuple(entry) for name, entry in json.load(f)["metrics"].items()}
+    results: Metrics = {}
+    for group in args.only or BENCHMARKS:
+        print(f"Running {group} benchmarks...", file=sys.stderr)
+        results.update(BENCHMARKS[group](args.scale))
+
+    regressions = compare(results, baseline, args.tolerance) if baseline else []
+    for name, (value, unit) in results.items():
+        line = f"{name:<40} {value:>12.2f} {unit}"
+        if baseline and name in baseline:
+            line += f"   baseline {baseline[name][0]:>10.2f} ({value / baseline[name][0] - 1:+.1%})"
+            if name in regressions:
+                line += "  REGRESSION"
+        print(line)
+    if args.json:
+        report = {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "scale": args.scale,
+            "metrics": {name: [value, unit] for name, (value, unit) in results.items()},
+        }
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if regressions:
+        print(f"{len(regressions)} metric(s) regressed by more than {args.tolerance:.0%}.", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,222 +1,103 @@
-import random
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
 import streamlit as st
-from typing import List, Optional, Dict, Any
-
-# --- Core Game Logic from scoundrel_engine.py ---
-# (with minor modifications for Streamlit integration)
-
-SUITS = ["hearts", "diamonds", "clubs", "spades"]
-RANKS = list(range(2, 11)) + ["J", "Q", "K", "A"]
-
-
-class Card:
-    """Represents a single playing card with Scoundrel-specific attributes."""
-
-    def __init__(self, suit: str, rank, joker_id: Optional[int] = None):
-        self.suit = suit
-        self.rank = rank
-        self.joker_id = joker_id  # For distinguishing joker_1.png from joker_2.png
-        self.value = self._determine_value()
-        self.type = self._determine_type()
-
-    def _determine_value(self) -> Optional[int]:
-        """Determines the card's value based on its rank."""
-        if self.suit == "joker":
-            return None
-        if isinstance(self.rank, int):
-            return self.rank
-        value_map = {"J": 11, "Q": 12, "K": 13, "A": 14}
-        return value_map.get(self.rank)
-
-    def _determine_type(self) -> Optional[str]:
-        """Determines the card's type (monster, weapon, etc.) based on its suit."""
-        if self.suit == "joker":
-            return "merchant"
-        if self.suit in ("spades", "clubs"):
-            return "monster"
-        if self.suit == "diamonds":
-            return "weapon"
-        if self.suit == "hearts":
-            return "potion"
-        return None
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 
-    def short_name(self) -> str:
-        """Returns a short, user-friendly name for the card."""
-        if self.suit == "joker":
-            return "Joker"
-        return f"{self.rank}{self.suit[0].upper()}"
-
-    def __repr__(self) -> str:
-        """Returns a string representation of the card."""
-        if self.suit == "joker":
-            return f"Joker ({self.joker_id})"
-        return f"{self.rank} of {self.suit}"
-
-
-class GameState:
-    """Manages all the state and rules for a game of Scoundrel."""
-    MAX_HEALTH = 20
-
-    def __init__(self, seed: Optional[int] = None):
-        if seed is not None:
-            random.seed(seed)
-        self.health: int = GameState.MAX_HEALTH
-        self.deck: List[Card] = self._build_deck()
-        self.discard: List[Card] = []
-        self.weapon: Optional[Card] = None
-        self.weapon_slain_values: List[int] = []
-        self.room: List[Card] = []
-        self.last_action: str = "Game started. Welcome to the dungeon!"
-        self.can_run: bool = True
-        self.draw_room()
-
-    def _build_deck(self) -> List[Card]:
-        """Creates and shuffles the initial deck according to Scoundrel rules."""
-        deck = []
-        for suit in SUITS:
-            for rank in RANKS:
-                if suit in ("hearts", "diamonds") and rank in ("J", "Q", "K", "A"):
-                    continue
-                deck.append(Card(suit, rank))
-        deck.append(Card("joker", None, joker_id=1))
-        deck.append(Card("joker", None, joker_id=2))
-        random.shuffle(deck)
-        return deck
-
-    def draw_room(self):
-        """Draws cards from the deck to fill the room up to 4 cards."""
-        while len(self.room) < 4 and self.deck:
-            self.room.append(self.deck.pop(0))
-
-    def _refill_if_needed(self):
-        """If the room is small, refills it from the deck and re-enables running."""
-        if len(self.room) <= 1 and self.deck:
-            # A new room is being generated, so the player should be allowed to run from it.
-            self.can_run = True
-            self.draw_room()
-
-    def _card_in_room(self, index: int) -> Card:
-        """Safely gets a card from the room by its index."""
-        if not (0 <= index < len(self.room)):
-            raise IndexError("Card index out of range in room.")
-        return self.room[index]
-    
-    def can_use_weapon_on(self, monster_card: Card) -> bool:
-        """Checks if the current weapon can be used on a specific monster."""
-        if not self.weapon or monster_card.type != 'monster':
-            return False
-        if not self.weapon_slain_values:
-            return True  # Weapon is fresh, can be used on anything
-        last_killed_value = self.weapon_slain_values[-1]
-        return monster_card.value < last_killed_value
-
-    def fight_monster(self, index: int, use_weapon: bool = False) -> None:
-        card = self._card_in_room(index)
-        if card.type != "monster":
-            self.last_action = f"Cannot fight {card}; it is not a monster."
-            return
-
-        damage_taken = card.value
-        used_weapon = False
-        if use_weapon and self.can_use_weapon_on(card):
-            used_weapon = True
-            damage_taken = max(0, card.value - self.weapon.value)
-
-        self.health -= damage_taken
-        self.room.pop(index)
-        action = f"Fought {card}"
-        if used_weapon:
-            action += f" with {self.weapon} (blocked {self.weapon.value})"
-            self.weapon_slain_values.append(card.value)
-        else:
-            action += " barehanded"
-        action += f". Took {damage_taken} damage. Health = {self.health}."
-        self.last_action = action
-        self._refill_if_needed()
-
-    def equip_weapon(self, index: int) -> None:
-        card = self._card_in_room(index)
-        if card.type != "weapon":
-            self.last_action = f"Cannot equip {card}; it is not a weapon."
-            return
-        if self.weapon:
-            self.discard.append(self.weapon)
-        self.weapon = self.room.pop(index)
-        self.weapon_slain_values = []
-        self.last_action = f"Equipped {self.weapon}."
-        self._refill_if_needed()
-
-    def drink_potion(self, index: int) -> None:
-        card = self._card_in_room(index)
-        if card.type != "potion":
-            self.last_action = f"Cannot drink {card}; it is not a potion."
-            return
-        healed = card.value
-        old_hp = self.health
-        self.health = min(GameState.MAX_HEALTH, self.health + healed)
-        self.room.pop(index)
-        self.last_action = f"Drank {card}. Health: {old_hp} -> {self.health}."
-        self._refill_if_needed()
-
-    def sell_to_merchant(self, index: int) -> None:
-        card = self._card_in_room(index)
-        if card.type != "merchant":
-            self.last_action = f"Card {card} is not a Merchant."
-            return
-        if not self.weapon:
-            self.last_action = "Merchant appears but you have no weapon to sell."
-            return
-        if self.weapon_slain_values:
-            heal = min(self.weapon_slain_values)
-        else:
-            heal = self.weapon.value
-        old_hp = self.health
-        self.health = min(GameState.MAX_HEALTH, self.health + heal)
-        self.last_action = f"Sold {self.weapon} to Merchant for {heal} HP. Health: {old_hp} -> {self.health}."
-        self.weapon = None
-        self.weapon_slain_values = []
-        self.room.pop(index)
-        self._refill_if_needed()
-
-    def run_from_room(self) -> None:
-        if not self.can_run:
-            self.last_action = "You cannot run twice in a row!"
-            return
-        random.shuffle(self.room)
-        self.deck.extend(self.room)
-        self.room = []
-        self.draw_room()
-        self.last_action = "Ran from the room. A new room is drawn. You cannot run from the next room."
-        self.can_run = False
-
-    def is_game_over(self) -> Dict[str, Any]:
-        if self.health <= 0:
-            return {"over": True, "result": "dead", "message": "You died."}
-        if not self.deck and not self.room:
-            return {"over": True, "result": "victory", "message": "Dungeon cleared — you win!"}
-        return {"over": False}
+from scoundrel_game.advisor import Advisor
+from scoundrel_game.assets import card_image_key, load_card_images
+from scoundrel_game.codec import decode_game, encode_game
+from scoundrel_game.game_engine import Card, GameState
+from scoundrel_game.metrics import RERUN_BUCKETS, ActiveSessions, GameHooks, Registry, exporter_from_spec
+from scoundrel_game.seed_index import DIFFICULTIES, SeedIndex
+from scoundrel_game.tablebase import Tablebase
 
+HINT_BUDGET_SECONDS = 2.0
+DUNGEON_LABELS = {"any": "Any dungeon", "easy": "Easy", "medium": "Medium", "hard": "Hard",
+                  "winnable": "Any winnable", "daily": "Daily dungeon"}
 
 # --- Streamlit UI and Application Logic ---
 
-def get_card_image_path(card: Card) -> str:
-    """Maps a Card object to its corresponding image file path."""
-    if card.type == 'merchant':
-        return f"cards/joker_{card.joker_id}.png"
-    
-    rank_map = {
-        "J": "jack", "Q": "queen", "K": "king", "A": "ace"
-    }
-    # Use rank directly if it's a number, otherwise map it from the dictionary
-    rank_str = str(card.rank)
-    if card.rank in rank_map:
-        rank_str = rank_map[card.rank]
-        
-    return f"cards/{rank_str}_{card.suit}.png"
+@st.cache_resource
+def card_images() -> Dict[str, bytes]:
+    """Process-wide table of pre-rendered card thumbnails, loaded once and shared by every session."""
+    return load_card_images()
+
+
+def action_label(action: str, card: Card, game: GameState) -> str:
+    """Button text for a legal action on a room card."""
+    if action == 'fight':
+        return f"Fight {card.short_name()} Barehanded"
+    if action == 'fight_weapon':
+        return f"Fight with {game.weapon.short_name()}"
+    if action == 'equip':
+        return f"Equip {card.short_name()}"
+    if action == 'drink':
+        return f"Drink {card.short_name()}"
+    if action == 'run':
+        return "Run From Room"
+    return "Sell to Merchant"
+
+
+@st.cache_resource
+def hint_pool() -> ThreadPoolExecutor:
+    """Process-wide worker pool shared by every session's hint searches."""
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="scoundrel-hints")
+
+@st.cache_resource
+def telemetry() -> Optional[Tuple[Registry, ActiveSessions]]:
+    """Process-wide metrics, enabled by setting SCOUNDREL_METRICS to http://host:port or file:path."""
+    spec = os.environ.get("SCOUNDREL_METRICS")
+    if not spec:
+        return None
+    registry = Registry()
+    registry.describe("rerun_seconds", "histogram", "Time to run the app script or its board fragment.", RERUN_BUCKETS)
+    registry.describe("active_sessions", "gauge", "Sessions active in the last ten minutes.")
+    GameState.hooks = GameHooks(registry)
+    exporter_from_spec(registry, spec).start()
+    return registry, ActiveSessions()
+
+
+@st.cache_resource
+def seed_index() -> Optional[SeedIndex]:
+    """Process-wide seed-difficulty index, enabled by pointing SCOUNDREL_SEED_INDEX at one."""
+    path = os.environ.get("SCOUNDREL_SEED_INDEX")
+    return SeedIndex(path) if path else None
+
+
+@st.cache_resource
+def tablebase() -> Optional[Tablebase]:
+    """Process-wide final-room tablebase for exact hints, enabled by pointing SCOUNDREL_TABLEBASE at one."""
+    path = os.environ.get("SCOUNDREL_TABLEBASE")
+    return Tablebase(path) if path else None
 
+
+def record_rerun(started: float) -> None:
+    """Reports how long this script or fragment run took and how many sessions are active."""
+    if metrics is None:
+        return
+    registry, sessions = metrics
+    ctx = get_script_run_ctx()
+    scope = "fragment" if fragment_run() else "app"
+    registry.observe("rerun_seconds", time.perf_counter() - started, scope=scope)
+    if ctx is not None:
+        registry.set("active_sessions", sessions.touch(ctx.session_id))
+
+
+def fragment_run() -> bool:
+    """True while Streamlit is rerunning just a fragment rather than the whole script."""
+    ctx = get_script_run_ctx()
+    return ctx is not None and bool(ctx.fragment_ids_this_run)
+
+
+render_started = time.perf_counter()
+metrics = telemetry()
 st.set_page_config(page_title="Scoundrel", layout="wide")
 
 # --- Sidebar for Rules ---
+new_game_controls = st.sidebar.container()
 st.sidebar.title("How to Play")
 st.sidebar.markdown("""
 ### Scoundrel Rules
@@ -277,10 +158,98 @@ st.sidebar.markdown("""
 
 
 # Initialize game state in session
-if 'game' not in st.session_state:
-    st.session_state.game = GameState()
-
-game = st.session_state.game
+if 'advisor' not in st.session_state:
+    st.session_state.advisor = Advisor(executor=hint_pool(), tablebase=tablebase())
+
+advisor = st.session_state.advisor
+
+
+def save_game(game: GameState) -> None:
+    """Stores the game's token and last event in the session and the token in the URL, so it can be bookmarked, shared or resumed."""
+    token = st.session_state.token = encode_game(game)
+    st.session_state.last_event = game.last_event
+    if st.query_params.get("game") != token:
+        st.query_params["game"] = token
+
+
+def current_game() -> GameState:
+    """The game as the session's token has it now; fragment reruns and callbacks read it here, never from a
+    module-level copy left over from the last full run."""
+    game = decode_game(st.session_state.token)
+    game.last_event = st.session_state.get('last_event', game.last_event)
+    return game
+
+
+def load_game() -> GameState:
+    """Rebuilds the game from its token on every run; the session holds tokens, never a GameState."""
+    url_token = st.query_params.get("game")
+    game = None
+    if url_token is not None and url_token != st.session_state.get('token'):
+        try:
+            game = decode_game(url_token)
+            advisor.reset()
+            st.session_state.pop('hint', None)
+            st.session_state.undo_tokens = []
+        except ValueError:
+            st.warning("That game link is invalid, so it was ignored.")
+    if game is None:
+        game = current_game() if st.session_state.get('token') else GameState()
+    save_game(game)
+    return game
+
+
+game = load_game()
+
+
+# Button callbacks run before the rerun they trigger, so the page is drawn once, already up to date.
+def play(action: str, index=None) -> None:
+    """Applies a move, keeping the hint advisor's search tree in step with the game."""
+    game = current_game()
+    advisor.observe(game, action, index)
+    st.session_state.pop('hint', None)
+    before = st.session_state.token, game.last_event
+    game.play(action, index)
+    save_game(game)
+    if st.session_state.token != before[0]:
+        st.session_state.setdefault('undo_tokens', []).append(before)
+
+
+def can_undo() -> bool:
+    return bool(st.session_state.get('undo_tokens'))
+
+
+def undo() -> None:
+    """Goes back to the token saved before the last move."""
+    advisor.reset()
+    st.session_state.pop('hint', None)
+    token, last_event = st.session_state.undo_tokens.pop()
+    previous = decode_game(token)
+    previous.last_event = last_event
+    save_game(previous)
+
+
+def new_game() -> None:
+    advisor.reset()
+    st.session_state.pop('hint', None)
+    seeds, seed = seed_index(), None
+    difficulty = st.session_state.get('difficulty', 'any')
+    if seeds is not None and difficulty != 'any':
+        try:
+            seed = seeds.seed_for(difficulty)
+        except LookupError:
+            st.toast(f"No {DUNGEON_LABELS[difficulty].lower()} seeds indexed yet, so this dungeon is random.")
+    st.session_state.undo_tokens = []
+    save_game(GameState(seed))
+
+
+def ask_for_hint() -> None:
+    st.session_state.hint = advisor.request(current_game(), budget=HINT_BUDGET_SECONDS)
+
+
+if seed_index() is not None:
+    with new_game_controls:
+        st.selectbox("Next dungeon", ("any",) + DIFFICULTIES, key='difficulty', format_func=DUNGEON_LABELS.get)
+        st.button("Start New Game", key="new_game_sidebar", on_click=new_game)
 
 # --- Main Page UI Rendering ---
 
@@ -298,77 +267,104 @@ if game_over_info["over"]:
     st.header("Game Over!")
     st.subheader(game_over_info["message"])
     st.metric("Final Health", game.health)
-    if st.button("Start New Game"):
-        st.session_state.game = GameState()
-        st.rerun()
+    st.button("Start New Game", on_click=new_game)
+    st.button("Undo Last Move", disabled=not can_undo(), on_click=undo)
+    record_rerun(render_started)
     st.stop()
 
 
-# Top Status Bar
-col1, col2, col3, col4 = st.columns(4)
-col1.metric("Health", f"{game.health} / {GameState.MAX_HEALTH}")
-col2.metric("Cards in Deck", len(game.deck))
-weapon_name = repr(game.weapon) if game.weapon else "None"
-col3.metric("Weapon", weapon_name)
-if game.weapon_slain_values:
-    col4.metric("Weapon Slain Values", ", ".join(map(str, game.weapon_slain_values)))
-else:
-    col4.metric("Weapon Slain Values", "None")
-
-
-st.markdown("---")
-st.subheader("Current Room")
-
-# Room Display and Actions
-if not game.room:
-    st.write("The room is empty. This shouldn't happen unless you've won!")
-else:
-    # Create columns for the cards in the room
-    cols = st.columns(len(game.room))
-    for i, card in enumerate(game.room):
-        with cols[i]:
-            # Set a fixed width for the card images to make them smaller
-            st.image(get_card_image_path(card), caption=repr(card), width=150)
-
-            # Action buttons based on card type
-            if card.type == 'monster':
-                if st.button(f"Fight {card.short_name()} Barehanded", key=f"fight_bare_{i}"):
-                    game.fight_monster(i, use_weapon=False)
-                    st.rerun()
-                
-                if game.can_use_weapon_on(card):
-                    if st.button(f"Fight with {game.weapon.short_name()}", key=f"fight_weapon_{i}"):
-                        game.fight_monster(i, use_weapon=True)
-                        st.rerun()
-
-            elif card.type == 'weapon':
-                if st.button(f"Equip {card.short_name()}", key=f"equip_{i}"):
-                    game.equip_weapon(i)
-                    st.rerun()
-
-            elif card.type == 'potion':
-                if st.button(f"Drink {card.short_name()}", key=f"drink_{i}"):
-                    game.drink_potion(i)
-                    st.rerun()
-
-            elif card.type == 'merchant':
-                if st.button(f"Sell to Merchant", key=f"sell_{i}", disabled=(not game.weapon)):
-                    game.sell_to_merchant(i)
-                    st.rerun()
-
-st.markdown("---")
-
-# General Actions and Log
-bottom_col1, bottom_col2 = st.columns([1, 3])
-
-with bottom_col1:
-    st.subheader("Actions")
-    if st.button("Run From Room", disabled=not game.can_run):
-        game.run_from_room()
-        st.rerun()
-
-with bottom_col2:
-    st.subheader("Last Action")
-    st.info(game.last_action)
-
-
+@st.fragment
+def board() -> None:
+    """Status bar, room, actions and hint panel: clicks in here rerun only this function, not the page."""
+    started = time.perf_counter()
+    game = current_game()
+    if game.is_game_over()["over"]:
+        st.rerun()  # the game-over screen replaces the whole page
+
+    # Top Status Bar
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Health", f"{game.health} / {game.rules.max_health}")
+    col2.metric("Cards in Deck", len(game.deck))
+    weapon_name = repr(game.weapon) if game.weapon else "None"
+    col3.metric("Weapon", weapon_name)
+    if game.weapon_slain_values:
+        col4.metric("Weapon Slain Values", ", ".join(map(str, game.weapon_slain_values)))
+    else:
+        col4.metric("Weapon Slain Values", "None")
+
+    st.markdown("---")
+    st.subheader("Current Room")
+
+    # Room Display and Actions
+    image_bytes = 0
+    if not game.room:
+        st.write("The room is empty. This shouldn't happen unless you've won!")
+    else:
+        # Create columns for the cards in the room
+        cols = st.columns(len(game.room))
+        images = card_images()
+        for i, card in enumerate(game.room):
+            with cols[i]:
+                image = images[card_image_key(card)]
+                image_bytes += len(image)
+                st.image(image, caption=repr(card), width=150)
+
+                # Action buttons come straight from the engine's legal moves for this card
+                actions = [action for action, index in game.legal_actions() if index == i]
+                if card.type == 'merchant' and not actions:
+                    st.button("Sell to Merchant", key=f"sell_{i}", disabled=True)
+                for action in actions:
+                    st.button(action_label(action, card, game), key=f"{action}_{i}", on_click=play, args=(action, i))
+
+    st.markdown("---")
+
+    # General Actions and Log
+    bottom_col1, bottom_col2 = st.columns([1, 3])
+
+    with bottom_col1:
+        st.subheader("Actions")
+        st.button("Run From Room", disabled=("run", None) not in game.legal_actions(), on_click=play, args=("run",))
+        st.button("Undo Last Move", disabled=not can_undo(), on_click=undo)
+
+    with bottom_col2:
+        st.subheader("Last Action")
+        st.info(game.last_action)
+
+    st.markdown("---")
+
+    # Hint panel: the search runs on the worker pool, so this script never waits on it
+    hint_col1, hint_col2 = st.columns([1, 3])
+
+    with hint_col1:
+        st.subheader("Hint")
+        st.button("Ask for a Hint", disabled=not game.legal_actions(), on_click=ask_for_hint)
+        hint = st.session_state.get('hint')
+        if hint is not None and not hint.done():
+            st.button("Stop Thinking", on_click=advisor.cancel)
+            st.button("Refresh Hint")
+
+    with hint_col2:
+        hint = st.session_state.get('hint')
+        if hint is None:
+            st.caption("The advisor plays out thousands of possible dungeons from here and suggests your best move.")
+        elif not hint.done():
+            st.write("Thinking...")
+        else:
+            result = hint.result()
+            card = game.room[result.index] if result.index is not None else None
+            if result.exact:
+                odds = "a certain win" if result.win_probability else "every line loses from here"
+            else:
+                odds = f"{result.win_probability:.0%} estimated win chance over {result.visits} simulations"
+            st.success(f"Suggested move: **{action_label(result.action, card, game)}** ({odds})")
+
+    with st.expander("Render stats"):
+        since = started if fragment_run() else render_started
+        st.caption(f"This {'update' if fragment_run() else 'page load'} took {(time.perf_counter() - since) * 1000:.1f} ms "
+                   f"and sent {image_bytes / 1024:.1f} KB of card images.")
+    if fragment_run():
+        record_rerun(started)
+
+
+board()
+record_rerun(render_started)
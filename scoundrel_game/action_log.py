@@ -0,0 +1,255 @@
+"""Append-only binary action logs and a streaming replay verifier.
+
+A log file is MAGIC followed by one record per game:
+
+    varint seed | claimed result (1 byte) | claimed health (signed byte)
+    | varint move count | moves, two per byte
+
+Each move is stored as its position in GameState.legal_actions() at that
+point, which is always below 16, so a whole game takes a few dozen bytes.
+Replaying a record from its seed both decodes the moves and re-verifies the
+claimed outcome.
+
+Run ``python -m scoundrel_game.action_log record games.log --games 100000`` to
+log bot games and ``python -m scoundrel_game.action_log verify games.log`` to
+audit them.
+"""
+import argparse
+import random
+import struct
+import sys
+import time
+from dataclasses import dataclass
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Tuple
+
+from .codec import read_varint, varint
+from .cards import card_code
+from .game_engine import STANDARD, GameState
+from .policies import POLICIES
+from .simulate import MAX_STEPS, POLICY_SALT, RESULT_CODES, RESULTS, GameResult, Summary
+
+MAGIC = b"SCNDLOG1"
+
+Move = Tuple[str, Optional[int]]
+
+
+@dataclass
+class LoggedGame:
+    seed: int
+    result: str
+    health: int
+    choices: List[int]
+
+
+@dataclass
+class Replay:
+    """Outcome of replaying a logged game; error says why the claim failed to verify."""
+    claim: LoggedGame
+    actual: GameResult
+    error: Optional[str] = None
+
+    @property
+    def verified(self) -> bool:
+        return self.error is None
+
+
+def _status(game) -> str:
+    over = game.is_game_over()
+    if over["over"]:
+        return over["result"]
+    return "stuck" if not game.action_mask() else "playing"
+
+
+def _position(game: GameState) -> tuple:
+    weapon = None if game.weapon is None else card_code(game.weapon)
+    return ([card_code(card) for card in game.deck], [card_code(card) for card in game.room], game.health, weapon,
+            list(game.weapon_slain_values), game.can_run)
+
+
+def _replay_moves(seed: int, moves: Iterable[Move]) -> Tuple[GameState, List[int]]:
+    game = GameState(seed, silent=True)
+    choices = []
+    for move in moves:
+        legal = game.legal_actions() if not game.is_game_over()["over"] else ()
+        if move not in legal:
+            raise ValueError(f"Move {move} is not legal after {len(choices)} moves of seed {seed}.")
+        choices.append(legal.index(move))
+        game.play(*move)
+    return game, choices
+
+
+def encode_moves(seed: int, moves: Iterable[Move]) -> List[int]:
+    """Turns (action, room index) moves into legal-action choices by replaying them from the seed."""
+    return _replay_moves(seed, moves)[1]
+
+
+def encode_record(seed: int, choices: List[int], result: str, health: int) -> bytes:
+    packed = bytearray((len(choices) + 1) // 2)
+    for i, choice in enumerate(choices):
+        packed[i >> 1] |= choice << (4 * (i & 1))
+    return (varint(seed) + struct.pack("Bb", RESULT_CODES[result], health)
+            + varint(len(choices)) + bytes(packed))
+
+
+class ActionLogWriter:
+    """Appends game records to a log file, writing the header if the file is new."""
+
+    def __init__(self, path: str):
+        # Unbuffered, so that each record goes out as a single O_APPEND write and concurrent
+        # appenders never interleave partial records.
+        self._file: BinaryIO = open(path, "ab", buffering=0)
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+
+    def write(self, seed: int, choices: List[int], result: str, health: int) -> None:
+        self._file.write(encode_record(seed, choices, result, health))
+
+    def write_game(self, game: GameState) -> None:
+        """Logs a game played from its seed, with its current status as the claimed outcome.
+
+        The game's history must replay from the seed to where the game stands now, which rules out
+        games resumed from a token and silent games played before snapshot() started their journal.
+        """
+        if game.rules != STANDARD:
+            raise ValueError("Only games under the standard rules can be logged.")
+        replayed, choices = _replay_moves(game.seed, game.history())
+        if _position(replayed) != _position(game):
+            raise ValueError("The game's history does not lead from its seed to its position, so it cannot be logged.")
+        self.write(game.seed, choices, _status(game), game.health)
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "ActionLogWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _parse(data: bytes, pos: int) -> Tuple[LoggedGame, int]:
+    """Decodes the record at pos; raises IndexError if data ends inside it."""
+    seed, pos = read_varint(data, pos)
+    if pos + 2 > len(data):
+        raise IndexError(pos)
+    result, health = struct.unpack_from("Bb", data, pos)
+    count, pos = read_varint(data, pos + 2)
+    end = pos + (count + 1) // 2
+    if end > len(data):
+        raise IndexError(end)
+    if result >= len(RESULTS):
+        raise ValueError(f"Corrupt record: unknown result code {result}.")
+    choices = []
+    for byte in data[pos:end]:
+        choices.append(byte & 0x0F)
+        choices.append(byte >> 4)
+    del choices[count:]
+    return LoggedGame(seed, RESULTS[result], health, choices), end
+
+
+def read_log(path: str, chunk_size: int = 1 << 20) -> Iterator[LoggedGame]:
+    """Streams the records of a log file in chunk_size reads, holding only one chunk in memory."""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a Scoundrel action log.")
+        buffer = b""
+        while True:
+            chunk = f.read(chunk_size)
+            data = buffer + chunk
+            pos = 0
+            while pos < len(data):
+                try:
+                    game, end = _parse(data, pos)
+                except IndexError:
+                    break
+                yield game
+                pos = end
+            buffer = data[pos:]
+            if not chunk:
+                if buffer:
+                    raise ValueError(f"{path} ends with a truncated record.")
+                return
+
+
+def replay(claim: LoggedGame) -> Replay:
+    """Replays a logged game from its seed and checks its claimed result and health."""
+    game = GameState(claim.seed, silent=True)
+    length = runs = 0
+    error = None
+    for choice in claim.choices:
+        legal = game.legal_actions() if not game.is_game_over()["over"] else ()
+        if choice >= len(legal):
+            error = f"illegal move {choice} at step {length}"
+            break
+        action = legal[choice]
+        game.play(*action)
+        runs += action[0] == "run"
+        length += 1
+    actual = GameResult(claim.seed, _status(game), game.health, length, runs)
+    if error is None and (actual.result, actual.health) != (claim.result, claim.health):
+        error = f"claimed {claim.result} with {claim.health} health, replay gives {actual.result} with {actual.health}"
+    return Replay(claim, actual, error)
+
+
+def verify(paths: Iterable[str]) -> Iterator[Replay]:
+    """Replays every record of every log, lazily."""
+    for path in paths:
+        for claim in read_log(path):
+            yield replay(claim)
+
+
+def record_games(path: str, games: int, policy: str = "greedy", start_seed: int = 0,
+                 max_steps: int = MAX_STEPS) -> None:
+    """Plays seeded bot games and appends them to a log, e.g. to produce audit fixtures."""
+    choose = POLICIES[policy]
+    with ActionLogWriter(path) as writer:
+        for seed in range(start_seed, start_seed + games):
+            rng = random.Random(seed ^ POLICY_SALT)
+            game = GameState(seed, silent=True)
+            choices = []
+            while len(choices) < max_steps and _status(game) == "playing":
+                action = choose(game, rng)
+                choices.append(game.legal_actions().index(action))
+                game.play(*action)
+            writer.write(seed, choices, _status(game), game.health)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Record and verify binary Scoundrel action logs.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    record = commands.add_parser("record", help="Append bot games to a log.")
+    record.add_argument("path")
+    record.add_argument("--games", type=int, default=10000)
+    record.add_argument("--policy", choices=sorted(POLICIES), default="greedy")
+    record.add_argument("--start-seed", type=int, default=0)
+    check = commands.add_parser("verify", help="Replay logs, check every claim and print statistics.")
+    check.add_argument("paths", nargs="+")
+    check.add_argument("--show", type=int, default=10, help="How many failed claims to list.")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    if args.command == "record":
+        record_games(args.path, args.games, args.policy, args.start_seed)
+        print(f"Logged {args.games} games to {args.path} in {time.perf_counter() - started:.1f}s")
+        return 0
+    summary = Summary()
+    failed = 0
+    for result in verify(args.paths):
+        summary.add(result.actual)
+        if not result.verified:
+            failed += 1
+            if failed <= args.show:
+                print(f"seed {result.claim.seed}: {result.error}")
+    elapsed = time.perf_counter() - started
+    print(f"Replayed {summary.games} games in {elapsed:.1f}s ({summary.games / elapsed:.0f} games/s); "
+          f"{summary.games - failed} verified, {failed} failed")
+    print(f"Win rate: {summary.win_rate:.2%} (deaths {summary.deaths}, stuck {summary.stuck})")
+    print(f"Mean game length: {summary.mean_length:.1f} actions, runs used: {summary.runs}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
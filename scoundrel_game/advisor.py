@@ -0,0 +1,193 @@
+"""Monte Carlo tree search advisor that suggests the next move.
+
+The player cannot see the deck order, so every iteration determinizes it: the
+hidden part of the deck and the RNG behind future runs are reshuffled, while
+cards put back from rooms the player ran from stay at the bottom. Then one path
+through a shared tree (information-set MCTS) is played out with the greedy
+policy. Searches run on a worker pool, stop at a wall-clock budget or on
+cancel(), and keep their tree so that hints on the following moves start warm.
+With a tablebase, the final room needs no search: once the deck is empty
+nothing is hidden, so hints there are exact and rollouts stop at the table.
+"""
+import math
+import random
+import threading
+import time
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from .game_engine import GameRandom, GameState
+from .policies import greedy_policy
+from .simulate import MAX_STEPS
+from .tablebase import Tablebase
+
+NodeKey = Tuple[str, Optional[str]]
+
+
+@dataclass
+class Hint:
+    action: str
+    index: Optional[int]
+    win_probability: float
+    visits: int
+    iterations: int
+    seconds: float
+    exact: bool = False
+
+
+class _Node:
+    __slots__ = ("children", "visits", "value", "wins")
+
+    def __init__(self):
+        self.children: Dict[NodeKey, "_Node"] = {}
+        self.visits = 0
+        self.value = 0.0
+        self.wins = 0
+
+
+def _node_key(game: GameState, action: str, index: Optional[int]) -> NodeKey:
+    # Moves are keyed by card rather than room slot so they stay meaningful across determinizations.
+    return action, None if index is None else repr(game.room[index])
+
+
+class Advisor:
+    """Recommends moves for one game; call observe() after each move to keep the tree."""
+
+    def __init__(self, executor: Optional[Executor] = None, exploration: float = 1.0,
+                 seed: Optional[int] = None, tablebase: Optional[Tablebase] = None):
+        self._executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="scoundrel-advisor")
+        self._owns_executor = executor is None
+        self.exploration = exploration
+        self._rng = random.Random(seed)
+        self.tablebase = tablebase
+        self._root: Optional[_Node] = None
+        self._root_observation: Optional[int] = None
+        self._cancel = threading.Event()
+        self._future: Optional[Future] = None
+        self._lock = threading.Lock()
+
+    def request(self, game: GameState, budget: float = 1.0) -> "Future[Hint]":
+        """Starts searching the current position in the background and returns a future Hint."""
+        self.cancel()
+        exact = self.tablebase.probe_game(game) if self.tablebase is not None else None
+        if exact is not None and exact[1] is not None:
+            value, (action, index) = exact
+            future: "Future[Hint]" = Future()
+            future.set_result(Hint(action, index, 1.0 if value else 0.0, 0, 0, 0.0, exact=True))
+            return future
+        position = game.clone()
+        observation = game.position_hash()
+        with self._lock:
+            if self._root is None or self._root_observation not in (None, observation):
+                self._root = _Node()
+            self._root_observation = observation
+            self._cancel = threading.Event()
+            self._future = self._executor.submit(self._search, self._root, position, budget, self._cancel)
+        return self._future
+
+    def cancel(self) -> None:
+        """Stops the search early: a queued one never starts, a running one resolves with its best move so far."""
+        self._cancel.set()
+        # Only a running search is waited for, and it stops within one iteration; it must, as it shares the tree.
+        if self._future is not None and not self._future.cancel():
+            self._future.result()
+
+    def observe(self, game: GameState, action: str, index: Optional[int] = None) -> None:
+        """Reports a move about to be played on game so the matching subtree becomes the new root."""
+        self.cancel()
+        with self._lock:
+            if self._root is not None:
+                self._root = self._root.children.get(_node_key(game, action, index))
+            self._root_observation = None
+
+    def reset(self) -> None:
+        self.cancel()
+        with self._lock:
+            self._root, self._root_observation = None, None
+
+    def shutdown(self) -> None:
+        self.cancel()
+        if self._owns_executor:
+            self._executor.shutdown(wait=False)
+
+    def _search(self, root: _Node, game: GameState, budget: float, cancel: threading.Event) -> Hint:
+        started = time.monotonic()
+        deadline = started + budget
+        iterations = 0
+        while not cancel.is_set() and time.monotonic() < deadline:
+            self._iterate(root, game)
+            iterations += 1
+        legal = game.legal_actions()
+        if not legal:
+            return Hint("none", None, 0.0, root.visits, iterations, time.monotonic() - started)
+        best, best_node = legal[0], None
+        for action in legal:
+            node = root.children.get(_node_key(game, *action))
+            if node is not None and (best_node is None or node.visits > best_node.visits):
+                best, best_node = action, node
+        win_probability = best_node.wins / best_node.visits if best_node and best_node.visits else 0.0
+        visits = best_node.visits if best_node else 0
+        return Hint(best[0], best[1], win_probability, visits, iterations, time.monotonic() - started)
+
+    def _iterate(self, root: _Node, game: GameState) -> None:
+        rng = self._rng
+        sim = _determinize(game, rng)
+        node, path = root, [root]
+        while not sim.is_game_over()["over"]:
+            legal = sim.legal_actions()
+            if not legal:
+                break
+            keys = [_node_key(sim, *action) for action in legal]
+            untried = [i for i, key in enumerate(keys) if key not in node.children]
+            if untried:
+                i = rng.choice(untried)
+                node.children[keys[i]] = child = _Node()
+                node = child
+                sim.play(*legal[i])
+                path.append(node)
+                break
+            log_visits = math.log(node.visits + 1)
+            best_i, best_score = 0, -1.0
+            for i, key in enumerate(keys):
+                child = node.children[key]
+                score = child.value / child.visits + self.exploration * math.sqrt(log_visits / child.visits)
+                if score > best_score:
+                    best_i, best_score = i, score
+            node = node.children[keys[best_i]]
+            sim.play(*legal[best_i])
+            path.append(node)
+        reward, won = _rollout(sim, rng, self.tablebase)
+        for visited in path:
+            visited.visits += 1
+            visited.value += reward
+            visited.wins += won
+
+
+def _determinize(game: GameState, rng: random.Random) -> GameState:
+    """A copy of the game with the deck's hidden part reshuffled and a fresh RNG for the runs to come."""
+    sim = game.clone()
+    # Playouts are not real play: no events, and nothing reaches installed hooks such as metrics.
+    sim.silent, sim.hooks = True, None
+    hidden = sim.deck[:len(sim.deck) - sim.known_bottom]
+    rng.shuffle(hidden)
+    sim.deck[:len(hidden)] = hidden
+    sim.rng = GameRandom(rng.getrandbits(32))
+    return sim
+
+
+def _rollout(game: GameState, rng: random.Random, tablebase: Optional[Tablebase] = None) -> Tuple[float, int]:
+    """Plays greedily to the end or the tablebase; losses still earn partial credit for how far the dungeon got."""
+    for _ in range(MAX_STEPS):
+        if game.is_game_over()["over"] or not game.action_mask():
+            break
+        exact = tablebase.probe_game(game) if tablebase is not None else None
+        if exact is not None:
+            if exact[0]:
+                return 1.0, 1
+            break
+        game.play(*greedy_policy(game, rng))
+    if game.is_game_over().get("result") == "victory":
+        return 1.0, 1
+    cleared = 1 - (len(game.deck) + len(game.room)) / len(game.rules.deck)
+    return 0.5 * cleared, 0
@@ -0,0 +1,88 @@
+"""Card image pipeline: pre-rendered thumbnails and an in-memory image table.
+
+Run ``python -m scoundrel_game.assets`` to write 150px thumbnails of every
+card to ``cards/thumbs``. load_card_images() serves those, or renders them in
+memory from the full-size PNGs when the build step has not been run.
+"""
+import argparse
+import io
+import os
+import sys
+from typing import Dict
+
+from .game_engine import Card
+
+CARD_DIR = "cards"
+THUMB_DIR = os.path.join(CARD_DIR, "thumbs")
+THUMB_WIDTH = 150
+# Streamlit passes PNG and JPEG bytes through untouched but re-encodes anything else on every call.
+THUMB_FORMAT = "PNG"
+
+_FACE_NAMES = {"J": "jack", "Q": "queen", "K": "king", "A": "ace"}
+
+
+def card_image_key(card: Card) -> str:
+    """File stem of a card's image, e.g. "10_hearts", "queen_spades" or "joker_2"."""
+    if card.type == "merchant":
+        return f"joker_{card.joker_id}"
+    return f"{_FACE_NAMES.get(card.rank, card.rank)}_{card.suit}"
+
+
+def render_thumbnail(path: str, width: int = THUMB_WIDTH) -> bytes:
+    from PIL import Image
+
+    with Image.open(path) as image:
+        height = round(image.height * width / image.width)
+        # A 256-colour palette is visually lossless for the flat card art and about a quarter the size.
+        thumb = image.convert("RGBA").resize((width, height), Image.LANCZOS).quantize(256, method=Image.FASTOCTREE)
+        out = io.BytesIO()
+        thumb.save(out, THUMB_FORMAT, optimize=True)
+    return out.getvalue()
+
+
+def build_thumbnails(src_dir: str = CARD_DIR, out_dir: str = THUMB_DIR, width: int = THUMB_WIDTH) -> Dict[str, int]:
+    """Writes a thumbnail for every PNG in src_dir and returns the size of each in bytes."""
+    os.makedirs(out_dir, exist_ok=True)
+    sizes = {}
+    for name in sorted(os.listdir(src_dir)):
+        stem, ext = os.path.splitext(name)
+        if ext.lower() != ".png":
+            continue
+        data = render_thumbnail(os.path.join(src_dir, name), width)
+        with open(os.path.join(out_dir, f"{stem}.{THUMB_FORMAT.lower()}"), "wb") as f:
+            f.write(data)
+        sizes[stem] = len(data)
+    return sizes
+
+
+def load_card_images(src_dir: str = CARD_DIR, thumb_dir: str = THUMB_DIR, width: int = THUMB_WIDTH) -> Dict[str, bytes]:
+    """Maps every card image key to its encoded thumbnail, preferring prebuilt files."""
+    images = {}
+    for name in sorted(os.listdir(src_dir)):
+        stem, ext = os.path.splitext(name)
+        if ext.lower() != ".png":
+            continue
+        prebuilt = os.path.join(thumb_dir, f"{stem}.{THUMB_FORMAT.lower()}")
+        if os.path.exists(prebuilt):
+            with open(prebuilt, "rb") as f:
+                images[stem] = f.read()
+        else:
+            images[stem] = render_thumbnail(os.path.join(src_dir, name), width)
+    return images
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Pre-render card thumbnails for the app.")
+    parser.add_argument("--src", default=CARD_DIR)
+    parser.add_argument("--out", default=THUMB_DIR)
+    parser.add_argument("--width", type=int, default=THUMB_WIDTH)
+    args = parser.parse_args(argv)
+    sizes = build_thumbnails(args.src, args.out, args.width)
+    original = sum(os.path.getsize(os.path.join(args.src, f"{stem}.png")) for stem in sizes)
+    print(f"Wrote {len(sizes)} thumbnails to {args.out}: {sum(sizes.values()) / 1024:.0f} KB "
+          f"(full-size PNGs: {original / 1024:.0f} KB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
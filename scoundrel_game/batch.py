@@ -0,0 +1,266 @@
+"""NumPy engine that advances thousands of Scoundrel games in lockstep.
+
+Each game is a row: the deck is a ring buffer over the integer card codes of
+the batch's Rules (the codes in scoundrel_game.cards under the standard rules), the room
+holds up to room_size codes (-1 marks an empty slot) and the weapon is tracked
+by its code and the values of the last and the smallest monsters it slew. The card, weapon and
+merchant tables come from the Rules, so a batch agrees with GameState game for
+game on the same seeds, rules and policy; see verify_against_engine.
+"""
+import random
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from .cards import KIND, MERCHANT, MONSTER, POTION, WEAPON
+from .game_engine import DRINK, EQUIP, FIGHT, FIGHT_WEAPON, RUN, SELL, STANDARD, Rules
+from .simulate import MAX_STEPS, RESULTS, Summary, play_game
+
+NO_ACTION = -1
+EMPTY = 4
+
+RESULT_NAMES = RESULTS
+DEAD, VICTORY, STUCK, PLAYING = range(len(RESULTS))
+
+_BASE_ACTION = np.array([FIGHT, EQUIP, DRINK, SELL, NO_ACTION], dtype=np.int8)
+
+BatchPolicy = Callable[["BatchGame"], Tuple[np.ndarray, np.ndarray]]
+
+
+class BatchGame:
+    """Holds one row of state per seeded game and applies one action per row per step."""
+
+    def __init__(self, seeds: Sequence[int], rules: Rules = STANDARD):
+        n = len(seeds)
+        self.rules = rules
+        self.deck_size = size = len(rules.deck)
+        # Card tables with a trailing sentinel so that room slot -1 indexes an empty card.
+        self.card_value = np.array([card.value or 0 for card in rules.deck] + [0], dtype=np.int16)
+        self.card_kind = np.array([KIND[card.type] for card in rules.deck] + [EMPTY], dtype=np.int8)
+        self._weapon_ok = np.array(rules.weapon_ok, dtype=bool)
+        self._sell_heal = np.array(rules.sell_heal, dtype=np.int16)
+        self.seeds = np.asarray(seeds, dtype=np.int64)
+        # Plain Random draws the same stream as GameRandom without the draw counting.
+        self.rngs: List[random.Random] = [random.Random(seed) for seed in seeds]
+        self.deck = np.empty((n, size), dtype=np.int8)
+        for row, rng in enumerate(self.rngs):
+            order = list(range(size))
+            rng.shuffle(order)
+            self.deck[row] = order
+        self.deck_head = np.zeros(n, dtype=np.int16)
+        self.deck_len = np.full(n, size, dtype=np.int16)
+        self.room = np.full((n, rules.room_size), -1, dtype=np.int8)
+        self.room_len = np.zeros(n, dtype=np.int16)
+        self.health = np.full(n, rules.max_health, dtype=np.int16)
+        self.weapon = np.full(n, -1, dtype=np.int8)
+        self.slain = np.zeros(n, dtype=np.int16)
+        # What a sale heals; the same as slain unless weapon_wear lets a weapon kill upwards.
+        self.least_slain = np.zeros(n, dtype=np.int16)
+        self.can_run = np.ones(n, dtype=bool)
+        self.result = np.full(n, PLAYING, dtype=np.int8)
+        self.length = np.zeros(n, dtype=np.int32)
+        self.runs = np.zeros(n, dtype=np.int32)
+        self._rows = np.arange(n)
+        self._draw(np.ones(n, dtype=bool))
+
+    def __len__(self) -> int:
+        return len(self.seeds)
+
+    @property
+    def active(self) -> np.ndarray:
+        return self.result == PLAYING
+
+    def kinds(self) -> np.ndarray:
+        return self.card_kind[self.room]
+
+    def values(self) -> np.ndarray:
+        return self.card_value[self.room]
+
+    def weapon_value(self) -> np.ndarray:
+        return np.where(self.weapon >= 0, self.card_value[self.weapon], 0)
+
+    def sell_heal(self) -> np.ndarray:
+        """Per row, what selling the weapon would heal."""
+        return self._sell_heal[self.weapon_value(), self.least_slain]
+
+    def weapon_usable(self) -> np.ndarray:
+        """Per room slot, whether can_use_weapon_on holds for that card."""
+        usable = self._weapon_ok[self.slain[:, None], self.values()]
+        return (self.kinds() == MONSTER) & (self.weapon >= 0)[:, None] & usable
+
+    def playable(self) -> np.ndarray:
+        """Per room slot, whether some action other than running removes that card."""
+        kinds = self.kinds()
+        return (kinds != EMPTY) & ~((kinds == MERCHANT) & (self.weapon < 0)[:, None])
+
+    def _draw(self, rows: np.ndarray) -> None:
+        width = self.room.shape[1]
+        for _ in range(width):
+            take = rows & (self.room_len < width) & (self.deck_len > 0)
+            if not take.any():
+                return
+            idx = self._rows[take]
+            self.room[idx, self.room_len[idx]] = self.deck[idx, self.deck_head[idx]]
+            self.deck_head[idx] = (self.deck_head[idx] + 1) % self.deck_size
+            self.deck_len[idx] -= 1
+            self.room_len[idx] += 1
+
+    def step(self, actions: np.ndarray, indices: np.ndarray) -> None:
+        """Applies one action per row; rows that are finished or given NO_ACTION are left alone."""
+        actions = np.where(self.active, actions, NO_ACTION)
+        width = self.room.shape[1]
+        slot = np.clip(indices, 0, width - 1)
+        in_room = slot < self.room_len
+        card = np.where(in_room, self.room[self._rows, slot], -1)
+        kind, value = self.card_kind[card], self.card_value[card]
+        weapon_value = self.weapon_value()
+        has_weapon = self.weapon >= 0
+
+        fight = ((actions == FIGHT) | (actions == FIGHT_WEAPON)) & (kind == MONSTER)
+        use_weapon = fight & (actions == FIGHT_WEAPON) & has_weapon & self._weapon_ok[self.slain, value]
+        damage = np.where(use_weapon, np.maximum(0, value - weapon_value), value)
+        equip = (actions == EQUIP) & (kind == WEAPON)
+        drink = (actions == DRINK) & (kind == POTION)
+        sell = (actions == SELL) & (kind == MERCHANT) & has_weapon
+
+        heal = np.where(drink, value, self._sell_heal[weapon_value, self.least_slain])
+        self.health = np.where(fight, self.health - damage, self.health)
+        self.health = np.where(drink | sell, np.minimum(self.rules.max_health, self.health + heal), self.health)
+        self.slain = np.where(use_weapon, value, np.where(equip | sell, 0, self.slain))
+        least = np.where(self.least_slain > 0, np.minimum(self.least_slain, value), value)
+        self.least_slain = np.where(use_weapon, least, np.where(equip | sell, 0, self.least_slain))
+        self.weapon = np.where(equip, card, np.where(sell, -1, self.weapon)).astype(np.int8)
+
+        removed = fight | equip | drink | sell
+        if removed.any():
+            shift = np.arange(width)[None, :] >= slot[:, None]
+            padded = np.concatenate([self.room, np.full((len(self), 1), -1, dtype=np.int8)], axis=1)
+            shifted = np.take_along_axis(padded, np.arange(width)[None, :] + shift, axis=1)
+            self.room = np.where(removed[:, None], shifted, self.room)
+            self.room_len -= removed
+            refill = removed & (self.room_len <= 1) & (self.deck_len > 0)
+            self.can_run |= refill
+            self._draw(refill)
+
+        run = (actions == RUN) & self.can_run
+        for row in self._rows[run]:
+            cards = self.room[row, :self.room_len[row]].tolist()
+            self.rngs[row].shuffle(cards)
+            tail = (self.deck_head[row] + self.deck_len[row] + np.arange(len(cards))) % self.deck_size
+            self.deck[row, tail] = cards
+            self.deck_len[row] += len(cards)
+            self.room[row] = -1
+            self.room_len[row] = 0
+        if run.any():
+            self._draw(run)
+            self.can_run &= ~run
+            self.runs += run
+
+        self.length += actions != NO_ACTION
+        self.result = np.where(self.active & (self.health <= 0), DEAD, self.result)
+        cleared = (self.deck_len == 0) & (self.room_len == 0)
+        self.result = np.where(self.active & cleared, VICTORY, self.result).astype(np.int8)
+
+
+def weapon_policy(batch: BatchGame) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorized policies.weapon_policy: first weapon fight, else the leftmost playable card."""
+    usable, playable = batch.weapon_usable(), batch.playable()
+    first_usable, first_playable = usable.argmax(axis=1), playable.argmax(axis=1)
+    base = _BASE_ACTION[batch.kinds()[batch._rows, first_playable]]
+    can_flee = batch.can_run & (batch.room_len > 0)
+    actions = np.where(usable.any(axis=1), FIGHT_WEAPON,
+                       np.where(playable.any(axis=1), base, np.where(can_flee, RUN, NO_ACTION)))
+    indices = np.where(usable.any(axis=1), first_usable, first_playable)
+    return actions.astype(np.int8), indices
+
+
+def _rank(tier, a, b) -> np.ndarray:
+    """Packs a (tier, a, b) preference tuple into one integer that sorts the same way."""
+    return (np.asarray(tier) + 10) * 10000 + (np.asarray(a) + 50) * 100 + (np.asarray(b) + 50)
+
+
+def greedy_policy(batch: BatchGame) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorized policies.greedy_policy, scoring every candidate action the same way."""
+    kinds, values = batch.kinds(), batch.values()
+    health = batch.health[:, None]
+    weapon_value = batch.weapon_value()[:, None]
+    slain = batch.slain[:, None]
+    lowest = np.iinfo(np.int64).min
+
+    worn = (slain > 0) & (slain <= values)
+    equip = np.where((values > weapon_value) | worn, _rank(2, values, 0), _rank(-2, 0, 0))
+    healed = np.minimum(batch.rules.max_health, health + values) - health
+    drink = np.where((healed == values) | (health < 10), _rank(1, healed, 0), _rank(-1, healed, 0))
+    fight = _rank(np.where(values < health, 0, -3), 0, -values)
+    sell = _rank(-1, batch.sell_heal()[:, None], 0)
+    base = np.select([kinds == MONSTER, kinds == WEAPON, kinds == POTION, kinds == MERCHANT],
+                     [fight, equip, drink, sell], lowest)
+    base = np.where(batch.playable(), base, lowest)
+    usable = batch.weapon_usable()
+    with_weapon = np.where(usable, _rank(np.where(values - weapon_value < health, 0, -3), 1, values), lowest)
+
+    # Running scores high only when every other option is a fight that would kill us.
+    damage = np.where(kinds == MONSTER, values, 0)
+    lethal_bare = (kinds != MONSTER) | (damage >= health)
+    lethal_weapon = ~usable | (values - weapon_value >= health)
+    only_lethal = (~batch.playable() | ((kinds == MONSTER) & lethal_bare & lethal_weapon)).all(axis=1)
+    can_flee = batch.can_run & (batch.room_len > 0)
+    run = np.where(can_flee, np.where(only_lethal, _rank(3, 0, 0), _rank(-4, 0, 0)), lowest)
+
+    # Candidate order matches GameState.legal_actions: per slot fight then fight_weapon, run last.
+    width = batch.room.shape[1]
+    scores = np.concatenate([np.stack([base, with_weapon], axis=2).reshape(len(batch), 2 * width), run[:, None]],
+                            axis=1)
+    choice = scores.argmax(axis=1)
+    slot = np.minimum(choice // 2, width - 1)
+    kind = kinds[batch._rows, slot]
+    actions = np.where(choice == 2 * width, RUN, np.where(choice % 2 == 1, FIGHT_WEAPON, _BASE_ACTION[kind]))
+    actions = np.where(scores.max(axis=1) == lowest, NO_ACTION, actions)
+    return actions.astype(np.int8), slot
+
+
+BATCH_POLICIES: Dict[str, BatchPolicy] = {
+    "greedy": greedy_policy,
+    "weapon": weapon_policy,
+}
+
+
+def play(seeds: Sequence[int], policy: str = "weapon", max_steps: int = MAX_STEPS,
+         rules: Rules = STANDARD) -> BatchGame:
+    """Plays every seed to the end in lockstep and returns the finished batch."""
+    choose = BATCH_POLICIES[policy]
+    batch = BatchGame(seeds, rules)
+    while batch.active.any():
+        # Same cut-off as simulate.play_game: out of steps, or nothing legal left to do.
+        no_moves = ~batch.playable().any(axis=1) & ~(batch.can_run & (batch.room_len > 0))
+        stuck = batch.active & ((batch.length >= max_steps) | no_moves)
+        batch.result = np.where(stuck, STUCK, batch.result).astype(np.int8)
+        if not batch.active.any():
+            break
+        batch.step(*choose(batch))
+    return batch
+
+
+def summarize(batch: BatchGame) -> Summary:
+    summary = Summary()
+    summary.games = len(batch)
+    summary.wins = int((batch.result == VICTORY).sum())
+    summary.deaths = int((batch.result == DEAD).sum())
+    summary.stuck = int((batch.result == STUCK).sum())
+    summary.runs = int(batch.runs.sum())
+    summary.health.update(batch.health.tolist())
+    summary.length.update(batch.length.tolist())
+    return summary
+
+
+def verify_against_engine(seeds: Sequence[int], policy: str = "weapon", max_steps: int = MAX_STEPS,
+                          rules: Rules = STANDARD) -> List[int]:
+    """Replays the seeds through GameState with the scalar policy and returns the seeds that differ."""
+    batch = play(seeds, policy, max_steps, rules)
+    mismatched = []
+    for row, seed in enumerate(seeds):
+        expected = play_game(seed, policy, max_steps, rules)
+        if (RESULT_NAMES[batch.result[row]], int(batch.health[row]), int(batch.length[row]),
+                int(batch.runs[row])) != (expected.result, expected.health, expected.length, expected.runs):
+            mismatched.append(seed)
+    return mismatched
@@ -0,0 +1,23 @@
+"""Integer card codes and the flyweight tables indexed by them.
+
+A card's code is its position in the standard rules' unshuffled deck, so
+tokens, logs, the solver and the tablebase all agree on it, and CARDS holds
+the very Card objects that games under the standard rules deal.
+"""
+from .game_engine import STANDARD, Card
+
+CARDS = STANDARD.deck
+DECK_SIZE = len(CARDS)
+
+MONSTER, WEAPON, POTION, MERCHANT = range(4)
+# Card.type -> kind, for tables over any Rules deck.
+KIND = {"monster": MONSTER, "weapon": WEAPON, "potion": POTION, "merchant": MERCHANT}
+
+CARD_VALUE = tuple(card.value or 0 for card in CARDS)
+CARD_KIND = tuple(KIND[card.type] for card in CARDS)
+_CODES = {(card.suit, card.rank, card.joker_id): code for code, card in enumerate(CARDS)}
+
+
+def card_code(card: Card) -> int:
+    """Returns the integer code of a Card object."""
+    return _CODES[(card.suit, card.rank, card.joker_id)]
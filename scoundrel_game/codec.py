@@ -0,0 +1,111 @@
+"""Compact, URL-safe tokens that capture a game in progress.
+
+A token holds the deck order, room, discard pile, health, weapon, slain
+values, can_run, the RNG position (seed plus words drawn), the counts of
+moves made and rooms run from and how many cards at the bottom of the deck
+came back from those rooms, one byte per card, so a fresh game fits in about
+80 characters. The undo history and the last_action message are not
+part of it. Version 1 tokens, which predate the counts, still decode with
+all three at zero.
+"""
+import base64
+from typing import List, Tuple
+
+from .cards import CARDS, CARD_KIND, DECK_SIZE, MONSTER, WEAPON, card_code
+from .game_engine import RESUMED, STANDARD, GameRandom, GameState
+
+VERSION = 2
+_NO_WEAPON = 0xFF
+# A game draws a few hundred words at most (the opening shuffle plus one small shuffle per run);
+# decoding replays them one by one, so a larger count is rejected before any work is done.
+MAX_DRAWS = 4096
+_MONSTER_VALUES = frozenset(CARDS[code].value for code in range(DECK_SIZE) if CARD_KIND[code] == MONSTER)
+
+
+def varint(n: int) -> bytes:
+    """Unsigned LEB128: seven bits per byte, low bits first."""
+    out = bytearray()
+    while n >= 0x80:
+        out.append(n & 0x7F | 0x80)
+        n >>= 7
+    out.append(n)
+    return bytes(out)
+
+
+def read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    """The varint at pos and the position after it; raises IndexError if data ends inside it."""
+    n = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        n |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return n, pos
+        shift += 7
+
+
+def encode_game(game: GameState) -> str:
+    """Packs a game's full position into a URL-safe token."""
+    seed, draws = game.rng.position()
+    if not isinstance(seed, int) or seed < 0:
+        raise ValueError("Only games with a non-negative integer seed can be encoded.")
+    if game.rules != STANDARD:
+        raise ValueError("Only games under the standard rules can be encoded.")
+    weapon = _NO_WEAPON if game.weapon is None else card_code(game.weapon)
+    deck = [card_code(card) for card in game.deck]
+    room = [card_code(card) for card in game.room]
+    discard = [card_code(card) for card in game.discard]
+    slain = list(game.weapon_slain_values)
+    data = bytearray((VERSION, game.can_run, game.health & 0xFF, weapon,
+                      len(deck), len(room), len(discard), len(slain)))
+    data += bytes(deck + room + discard + slain)
+    data += varint(seed) + varint(draws) + varint(game.actions) + varint(game.runs) + varint(game.known_bottom)
+    return base64.urlsafe_b64encode(bytes(data)).rstrip(b"=").decode("ascii")
+
+
+def decode_game(token: str) -> GameState:
+    """Rebuilds the GameState packed by encode_game; raises ValueError on a malformed token."""
+    try:
+        data = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        version, can_run, health, weapon, n_deck, n_room, n_discard, n_slain = data[:8]
+        if version not in (1, VERSION):
+            raise ValueError(f"unsupported version {version}")
+        pos = 8
+        sections: List[List[int]] = []
+        for n in (n_deck, n_room, n_discard, n_slain):
+            sections.append(list(data[pos:pos + n]))
+            pos += n
+        seed, pos = read_varint(data, pos)
+        draws, pos = read_varint(data, pos)
+        actions = runs = known_bottom = 0
+        if version >= 2:
+            actions, pos = read_varint(data, pos)
+            runs, pos = read_varint(data, pos)
+            known_bottom, pos = read_varint(data, pos)
+    except (ValueError, IndexError, TypeError) as e:
+        raise ValueError(f"Invalid game token: {e}") from None
+    deck, room, discard, slain = sections
+    health = health - 0x100 if health >= 0x80 else health
+    cards = deck + room + discard + ([] if weapon == _NO_WEAPON else [weapon])
+    if (pos != len(data) or len(room) > 4 or len(set(cards)) != len(cards) or max(cards, default=0) >= DECK_SIZE
+            or health > GameState.MAX_HEALTH or can_run > 1 or draws > MAX_DRAWS or runs > actions
+            or known_bottom > len(deck)
+            or (weapon != _NO_WEAPON and CARD_KIND[weapon] != WEAPON)
+            or any(CARD_KIND[card] != WEAPON for card in discard)
+            or (slain and weapon == _NO_WEAPON) or any(a <= b for a, b in zip(slain, slain[1:]))
+            or any(value not in _MONSTER_VALUES for value in slain)):
+        raise ValueError("Invalid game token: inconsistent game state.")
+    game = GameState(seed)
+    game.rng = GameRandom.from_position(seed, draws)
+    game.health = health
+    game.deck = [CARDS[code] for code in deck]
+    game.room = [CARDS[code] for code in room]
+    game.discard = [CARDS[code] for code in discard]
+    game.weapon = None if weapon == _NO_WEAPON else CARDS[weapon]
+    game.weapon_slain_values = slain
+    game.can_run = bool(can_run)
+    game.actions, game.runs, game.known_bottom = actions, runs, known_bottom
+    game.last_event = (RESUMED,)
+    game._mask = None
+    game.rehash()
+    return game
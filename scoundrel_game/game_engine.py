@@ -1,9 +1,126 @@
+import copy
 import random
-from typing import List, Optional, Dict, Any
+from dataclasses import dataclass, fields
+from typing import List, Optional, Dict, Any, Tuple
 
 SUITS = ["hearts", "diamonds", "clubs", "spades"]
 RANKS = list(range(2, 11)) + ["J", "Q", "K", "A"]
 
+_SEED_SOURCE = random.SystemRandom()
+
+# Action codes; in an action mask, room action a on card i is bit a * ROOM_SLOTS + i and running is RUN_BIT.
+FIGHT, FIGHT_WEAPON, EQUIP, DRINK, SELL, RUN = range(6)
+ACTIONS = ("fight", "fight_weapon", "equip", "drink", "sell", "run")
+ROOM_SLOTS = 8  # the largest room any rules allow
+RUN_BIT = 1 << (RUN * ROOM_SLOTS)
+
+# Event codes; an event is a tuple of its code and fields, narrated only when last_action is read.
+(STARTED, FOUGHT, EQUIPPED, DRANK, SOLD, RAN, NOT_A_MONSTER, NOT_A_WEAPON, NOT_A_POTION, NOT_A_MERCHANT,
+ NO_WEAPON_TO_SELL, CANNOT_RUN, RESUMED) = range(13)
+
+
+def _fought(card, weapon, damage, health) -> str:
+    how = f" with {weapon} (blocked {weapon.value})" if weapon is not None else " barehanded"
+    return f"Fought {card}{how}. Took {damage} damage. Health = {health}."
+
+
+_NARRATION = {
+    STARTED: lambda: "Game started. Welcome to the dungeon!",
+    FOUGHT: _fought,
+    EQUIPPED: lambda weapon: f"Equipped {weapon}.",
+    DRANK: lambda card, old_hp, hp: f"Drank {card}. Health: {old_hp} -> {hp}.",
+    SOLD: lambda weapon, heal, old_hp, hp: f"Sold {weapon} to Merchant for {heal} HP. Health: {old_hp} -> {hp}.",
+    RAN: lambda: "Ran from the room. A new room is drawn. You cannot run from the next room.",
+    NOT_A_MONSTER: lambda card: f"Cannot fight {card}; it is not a monster.",
+    NOT_A_WEAPON: lambda card: f"Cannot equip {card}; it is not a weapon.",
+    NOT_A_POTION: lambda card: f"Cannot drink {card}; it is not a potion.",
+    NOT_A_MERCHANT: lambda card: f"Card {card} is not a Merchant.",
+    NO_WEAPON_TO_SELL: lambda: "Merchant appears but you have no weapon to sell.",
+    CANNOT_RUN: lambda: "You cannot run twice in a row!",
+    RESUMED: lambda: "Game resumed.",
+}
+
+
+# Position hashing: the room, weapon, health, slain values and can_run are XORed in Zobrist-style,
+# and the deck is a polynomial over its cards' keys, so that drawing from the front and appending at
+# the back are both O(1). The base is odd, so it can be divided out modulo 2**64.
+_MASK64 = (1 << 64) - 1
+_DECK_BASE = 0x9E3779B97F4A7C15
+_DECK_BASE_INV = pow(_DECK_BASE, -1, 1 << 64)
+_DECK_POWERS = tuple(pow(_DECK_BASE, i, 1 << 64) for i in range(64))
+_KEY_SOURCE = random.Random(0x5C0A7D)
+# (suit, rank, joker_id) -> (key while in the deck or room, key while equipped)
+_CARD_KEYS = {(suit, rank, None): (_KEY_SOURCE.getrandbits(64), _KEY_SOURCE.getrandbits(64))
+              for suit in SUITS for rank in RANKS}
+_CARD_KEYS.update({("joker", None, joker_id): (_KEY_SOURCE.getrandbits(64), _KEY_SOURCE.getrandbits(64))
+                   for joker_id in (1, 2)})
+# Health runs from max_health (under 100) down to about -310 if every monster is fought after death,
+# fewer than 512 values, so health & _HEALTH_MASK keeps any reachable health apart from the others.
+_HEALTH_MASK = 0x1FF
+_HEALTH_KEYS = tuple(_KEY_SOURCE.getrandbits(64) for _ in range(_HEALTH_MASK + 1))
+_SLAIN_KEYS = (0,) + tuple(_KEY_SOURCE.getrandbits(64) for _ in range(1, 15))  # by last value slain; 0 is none
+_CAN_RUN_KEY = _KEY_SOURCE.getrandbits(64)
+# By smallest value slain, XORed in only when it differs from the last (possible under weapon_wear="none").
+_LEAST_SLAIN_KEYS = (0,) + tuple(_KEY_SOURCE.getrandbits(64) for _ in range(1, 15))
+
+
+def narrate(event: Optional[tuple]) -> str:
+    """Renders an event as the message shown to the player; silent games have none."""
+    if event is None: return ""
+    return _NARRATION[event[0]](*event[1:])
+
+
+class GameRandom(random.Random):
+    """Per-game RNG whose position is its seed plus the number of 32-bit words drawn."""
+
+    def __init__(self, seed: Optional[int] = None):
+        super().__init__(seed)
+
+    def seed(self, a=None, version: int = 2) -> None:
+        super().seed(a, version)
+        self.initial_seed = a
+        self.draws = 0
+
+    def getrandbits(self, k: int) -> int:
+        self.draws += (k + 31) >> 5
+        return super().getrandbits(k)
+
+    def random(self) -> float:
+        self.draws += 2
+        return super().random()
+
+    def getstate(self):
+        return super().getstate(), self.initial_seed, self.draws
+
+    def setstate(self, state) -> None:
+        mt_state, self.initial_seed, self.draws = state
+        super().setstate(mt_state)
+
+    def __copy__(self) -> "GameRandom":
+        # Skip __init__, which would reseed from the OS before the state is overwritten.
+        twin = type(self).__new__(type(self))
+        twin.setstate(self.getstate())
+        return twin
+
+    def position(self) -> Tuple[Any, int]:
+        return self.initial_seed, self.draws
+
+    @classmethod
+    def from_position(cls, seed, draws: int) -> "GameRandom":
+        """Rebuilds the stream at a saved position by replaying its draws."""
+        rng = cls(seed)
+        rng.rewind(draws)
+        return rng
+
+    def rewind(self, draws: int) -> None:
+        """Moves to an earlier position of the stream by replaying it from the seed."""
+        if draws < self.draws:
+            if self.initial_seed is None:
+                raise ValueError("A stream seeded from the OS cannot be replayed.")
+            self.seed(self.initial_seed)
+        for _ in range(draws - self.draws):
+            self.getrandbits(32)
+
 
 class Card:
     """Represents a single playing card with Scoundrel-specific attributes."""
@@ -14,6 +131,7 @@ class Card:
         self.joker_id = joker_id
         self.value = self._determine_value()
         self.type = self._determine_type()
+        self.key, self.weapon_key = _CARD_KEYS.get((suit, rank, joker_id), (0, 0))
 
     def _determine_value(self) -> Optional[int]:
         if self.suit == "joker": return None
@@ -37,44 +155,178 @@ class Card:
         return f"{self.rank} of {self.suit}"
 
 
+WEAR_RULES = ("strict", "equal", "none")
+HEAL_RULES = ("slain", "weapon")
+
+
+@dataclass(frozen=True)
+class Rules:
+    """A rule variant, compiled once into the tables that GameState plays from.
+
+    The defaults are the standard rules. weapon_wear says what a weapon may
+    kill after its last kill: a strictly smaller monster, one no larger, or
+    anything. merchant_heal says what a sale heals: the value of the weapon's
+    smallest kill (its own value if unused), or always its own value.
+    """
+    max_health: int = 20
+    room_size: int = 4
+    red_face_cards: bool = False  # keep the red J, Q, K and A as weapons and potions worth 11-14
+    merchants: bool = True
+    weapon_wear: str = "strict"
+    merchant_heal: str = "slain"
+
+    def __post_init__(self):
+        if not 1 <= self.max_health < 100:
+            raise ValueError("max_health must be between 1 and 99.")
+        if not 2 <= self.room_size <= ROOM_SLOTS:
+            raise ValueError(f"room_size must be between 2 and {ROOM_SLOTS}.")
+        if self.weapon_wear not in WEAR_RULES:
+            raise ValueError(f"Unknown weapon_wear {self.weapon_wear!r}; choose from {', '.join(WEAR_RULES)}.")
+        if self.merchant_heal not in HEAL_RULES:
+            raise ValueError(f"Unknown merchant_heal {self.merchant_heal!r}; choose from {', '.join(HEAL_RULES)}.")
+        # The unshuffled deck; a card's code under these rules is its position here. Cards never
+        # change once built, so every game under the same Rules shares these objects.
+        deck = [Card(suit, rank) for suit in SUITS for rank in RANKS
+                if self.red_face_cards or not (suit in ("hearts", "diamonds") and rank in ("J", "Q", "K", "A"))]
+        if self.merchants:
+            deck += [Card("joker", None, joker_id=1), Card("joker", None, joker_id=2)]
+        wears = {"strict": lambda value, slain: value < slain, "equal": lambda value, slain: value <= slain,
+                 "none": lambda value, slain: True}[self.weapon_wear]
+        # weapon_ok[last slain][monster value], where 0 means the weapon is unused.
+        weapon_ok = tuple(tuple(not slain or wears(value, slain) for value in range(15)) for slain in range(15))
+        # sell_heal[weapon value][smallest slain], where 0 means the weapon is unused.
+        sell_heal = tuple(tuple(slain if slain and self.merchant_heal == "slain" else weapon for slain in range(15))
+                          for weapon in range(15))
+        object.__setattr__(self, "deck", tuple(deck))
+        object.__setattr__(self, "weapon_ok", weapon_ok)
+        object.__setattr__(self, "sell_heal", sell_heal)
+
+    def __reduce__(self):
+        # Pickle the specification only; worker processes compile their own tables.
+        return type(self), tuple(getattr(self, f.name) for f in fields(self))
+
+    @property
+    def spec(self) -> str:
+        """The overrides as parse() reads them, or "standard"."""
+        changed = [f"{f.name}={_spec_value(getattr(self, f.name))}" for f in fields(self)
+                   if getattr(self, f.name) != f.default]
+        return ",".join(changed) or "standard"
+
+    @classmethod
+    def parse(cls, spec: str) -> "Rules":
+        """Rules from "standard" or overrides such as "max_health=30,room_size=5,merchants=off"."""
+        types = {f.name: f.type for f in fields(cls)}
+        overrides: Dict[str, Any] = {}
+        for item in spec.replace(" ", "").split(","):
+            if item in ("", "standard"):
+                continue
+            name, _, value = item.partition("=")
+            if name not in types:
+                raise ValueError(f"Unknown rule {name!r}; choose from {', '.join(types)}.")
+            if types[name] is bool:
+                if value not in ("on", "off", "true", "false"):
+                    raise ValueError(f"{name} must be on or off, not {value!r}.")
+                overrides[name] = value in ("on", "true")
+            elif types[name] is int:
+                try:
+                    overrides[name] = int(value)
+                except ValueError:
+                    raise ValueError(f"{name} must be an integer, not {value!r}.") from None
+            else:
+                overrides[name] = value
+        return cls(**overrides)
+
+
+def _spec_value(value) -> str:
+    return ("on" if value else "off") if isinstance(value, bool) else str(value)
+
+
+STANDARD = Rules()
+
+
 class GameState:
     """Manages all the state and rules for a game of Scoundrel."""
-    MAX_HEALTH = 20
+    MAX_HEALTH = STANDARD.max_health  # under the standard rules; a game's own cap is rules.max_health
+    # Instrumentation such as metrics.GameHooks; None keeps play() free of any measurement.
+    hooks = None
 
-    def __init__(self, seed: Optional[int] = None):
-        if seed is not None:
-            random.seed(seed)
-        self.health: int = GameState.MAX_HEALTH
+    def __init__(self, seed: Optional[int] = None, silent: bool = False, rules: Rules = STANDARD):
+        if seed is None:
+            seed = _SEED_SOURCE.getrandbits(32)
+        self.seed: int = seed
+        self.silent: bool = silent
+        self.rules: Rules = rules
+        self.rng: GameRandom = GameRandom(seed)
+        self.health: int = rules.max_health
         self.deck: List[Card] = self._build_deck()
         self.discard: List[Card] = []
         self.weapon: Optional[Card] = None
         self.weapon_slain_values: List[int] = []
         self.room: List[Card] = []
-        self.last_action: str = "Game started. Welcome to the dungeon!"
+        self.last_event: Optional[tuple] = None if silent else (STARTED,)
         self.can_run: bool = True
+        # Moves that changed the game and rooms run from; unlike history() they survive silence and tokens.
+        self.actions: int = 0
+        self.runs: int = 0
+        # Cards at the end of the deck that were put back from rooms the player ran from, so are not hidden.
+        self.known_bottom: int = 0
+        self._mask: Optional[int] = None
+        self._legal: Optional[tuple] = None
+        self._journal: List[tuple] = []
+        self._journal_silent = False  # silent games journal only once snapshot() asks for it
+        self.rehash()
         self.draw_room()
 
     def _build_deck(self) -> List[Card]:
-        deck = []
-        for suit in SUITS:
-            for rank in RANKS:
-                if suit in ("hearts", "diamonds") and rank in ("J", "Q", "K", "A"):
-                    continue
-                deck.append(Card(suit, rank))
-        deck.append(Card("joker", None, joker_id=1))
-        deck.append(Card("joker", None, joker_id=2))
-        random.shuffle(deck)
+        deck = list(self.rules.deck)
+        self.rng.shuffle(deck)
         return deck
 
     def draw_room(self):
-        while len(self.room) < 4 and self.deck:
-            self.room.append(self.deck.pop(0))
+        room, deck = self.room, self.deck
+        deck_hash, h = self._deck_hash, self._hash
+        size = self.rules.room_size
+        while len(room) < size and deck:
+            card = deck.pop(0)
+            room.append(card)
+            deck_hash = (deck_hash - card.key) * _DECK_BASE_INV & _MASK64
+            h ^= card.key
+        self._deck_hash, self._hash = deck_hash, h
+        self.known_bottom = min(self.known_bottom, len(deck))
+        self._mask = None
 
     def _refill_if_needed(self):
         if len(self.room) <= 1 and self.deck:
+            if not self.can_run: self._hash ^= _CAN_RUN_KEY
             self.can_run = True
             self.draw_room()
 
+    def _slain_key(self) -> int:
+        slain = self.weapon_slain_values
+        if not slain:
+            return 0
+        last, least = slain[-1], min(slain)
+        return _SLAIN_KEYS[last] if least == last else _SLAIN_KEYS[last] ^ _LEAST_SLAIN_KEYS[least]
+
+    def rehash(self) -> None:
+        """Recomputes the position hash from scratch; call it after assigning to fields directly."""
+        deck_hash = 0
+        for i, card in enumerate(self.deck):
+            deck_hash += card.key * _DECK_POWERS[i]
+        self._deck_hash = deck_hash & _MASK64
+        h = _HEALTH_KEYS[self.health & _HEALTH_MASK] ^ self._slain_key() ^ (_CAN_RUN_KEY if self.can_run else 0)
+        if self.weapon: h ^= self.weapon.weapon_key
+        for card in self.room:
+            h ^= card.key
+        self._hash = h
+
+    def position_hash(self) -> int:
+        """64-bit key of the deck order, room cards, health, weapon, last and smallest slain values and can_run.
+
+        It is kept up to date in O(1) per action, for transposition tables and cache keys.
+        """
+        return self._deck_hash ^ self._hash
+
     def _card_in_room(self, index: int) -> Card:
         if not (0 <= index < len(self.room)):
             raise IndexError("Card index out of range in room.")
@@ -83,87 +335,232 @@ class GameState:
     def can_use_weapon_on(self, monster_card: Card) -> bool:
         if not self.weapon or monster_card.type != 'monster':
             return False
-        if not self.weapon_slain_values:
-            return True
-        last_killed_value = self.weapon_slain_values[-1]
-        return monster_card.value < last_killed_value
+        slain = self.weapon_slain_values
+        return self.rules.weapon_ok[slain[-1] if slain else 0][monster_card.value]
 
     def fight_monster(self, index: int, use_weapon: bool = False) -> None:
         card = self._card_in_room(index)
         if card.type != "monster":
-            self.last_action = f"Cannot fight {card}; it is not a monster."
+            if not self.silent: self.last_event = (NOT_A_MONSTER, card)
             return
+        used_weapon = use_weapon and self.can_use_weapon_on(card)
+        self._record("fight_weapon" if used_weapon else "fight", index)
         damage_taken = card.value
-        used_weapon = False
-        if use_weapon and self.can_use_weapon_on(card):
-            used_weapon = True
+        if used_weapon:
             damage_taken = max(0, card.value - self.weapon.value)
+        self._hash ^= (_HEALTH_KEYS[self.health & _HEALTH_MASK] ^ _HEALTH_KEYS[(self.health - damage_taken) & _HEALTH_MASK]
+                       ^ card.key)
         self.health -= damage_taken
         self.room.pop(index)
-        action = f"Fought {card}"
+        self._mask = None
         if used_weapon:
-            action += f" with {self.weapon} (blocked {self.weapon.value})"
+            self._hash ^= self._slain_key()
             self.weapon_slain_values.append(card.value)
-        else:
-            action += " barehanded"
-        action += f". Took {damage_taken} damage. Health = {self.health}."
-        self.last_action = action
+            self._hash ^= self._slain_key()
+        if not self.silent:
+            self.last_event = (FOUGHT, card, self.weapon if used_weapon else None, damage_taken, self.health)
         self._refill_if_needed()
 
     def equip_weapon(self, index: int) -> None:
         card = self._card_in_room(index)
         if card.type != "weapon":
-            self.last_action = f"Cannot equip {card}; it is not a weapon."
+            if not self.silent: self.last_event = (NOT_A_WEAPON, card)
             return
+        self._record("equip", index)
         if self.weapon:
             self.discard.append(self.weapon)
+            self._hash ^= self.weapon.weapon_key
+        self._hash ^= card.key ^ card.weapon_key ^ self._slain_key()
         self.weapon = self.room.pop(index)
         self.weapon_slain_values = []
-        self.last_action = f"Equipped {self.weapon}."
+        self._mask = None
+        if not self.silent: self.last_event = (EQUIPPED, self.weapon)
         self._refill_if_needed()
 
     def drink_potion(self, index: int) -> None:
         card = self._card_in_room(index)
         if card.type != "potion":
-            self.last_action = f"Cannot drink {card}; it is not a potion."
+            if not self.silent: self.last_event = (NOT_A_POTION, card)
             return
+        self._record("drink", index)
         healed = card.value
         old_hp = self.health
-        self.health = min(GameState.MAX_HEALTH, self.health + healed)
+        self.health = min(self.rules.max_health, self.health + healed)
+        self._hash ^= _HEALTH_KEYS[old_hp & _HEALTH_MASK] ^ _HEALTH_KEYS[self.health & _HEALTH_MASK] ^ card.key
         self.room.pop(index)
-        self.last_action = f"Drank {card}. Health: {old_hp} -> {self.health}."
+        self._mask = None
+        if not self.silent: self.last_event = (DRANK, card, old_hp, self.health)
         self._refill_if_needed()
 
     def sell_to_merchant(self, index: int) -> None:
         card = self._card_in_room(index)
         if card.type != "merchant":
-            self.last_action = f"Card {card} is not a Merchant."
+            if not self.silent: self.last_event = (NOT_A_MERCHANT, card)
             return
         if not self.weapon:
-            self.last_action = "Merchant appears but you have no weapon to sell."
+            if not self.silent: self.last_event = (NO_WEAPON_TO_SELL,)
             return
-        if self.weapon_slain_values:
-            heal = min(self.weapon_slain_values)
-        else:
-            heal = self.weapon.value
+        self._record("sell", index)
+        slain = self.weapon_slain_values
+        heal = self.rules.sell_heal[self.weapon.value][min(slain) if slain else 0]
         old_hp = self.health
-        self.health = min(GameState.MAX_HEALTH, self.health + heal)
-        self.last_action = f"Sold {self.weapon} to Merchant for {heal} HP. Health: {old_hp} -> {self.health}."
+        self.health = min(self.rules.max_health, self.health + heal)
+        self._hash ^= (_HEALTH_KEYS[old_hp & _HEALTH_MASK] ^ _HEALTH_KEYS[self.health & _HEALTH_MASK]
+                       ^ self.weapon.weapon_key ^ self._slain_key() ^ card.key)
+        if not self.silent: self.last_event = (SOLD, self.weapon, heal, old_hp, self.health)
         self.weapon = None
         self.weapon_slain_values = []
         self.room.pop(index)
+        self._mask = None
         self._refill_if_needed()
 
     def run_from_room(self) -> None:
         if not self.can_run:
-            self.last_action = "You cannot run twice in a row!"
+            if not self.silent: self.last_event = (CANNOT_RUN,)
             return
-        random.shuffle(self.room)
-        self.deck.extend(self.room)
+        self._record("run")
+        self.rng.shuffle(self.room)
+        for card in self.room:
+            self._deck_hash = (self._deck_hash + card.key * _DECK_POWERS[len(self.deck)]) & _MASK64
+            self._hash ^= card.key
+            self.deck.append(card)
+        self.known_bottom += len(self.room)
         self.room = []
         self.draw_room()
-        self.last_action = "Ran from the room. A new room is drawn. You cannot run from the next room."
+        if not self.silent: self.last_event = (RAN,)
+        self._hash ^= _CAN_RUN_KEY
         self.can_run = False
+        self._mask = None
+
+    @property
+    def last_action(self) -> str:
+        """Narration of the last event, rendered only when read."""
+        return narrate(self.last_event)
+
+    def _record(self, action: str, index: Optional[int] = None) -> None:
+        """Counts the move and journals what it may change so that restore() can roll it back."""
+        run = action == "run"
+        self.actions += 1
+        self.runs += run
+        if self.silent and not self._journal_silent:
+            return
+        self._journal.append((tuple(self.room), len(self.deck), len(self.room) if run else 0, self.health,
+                              self.weapon, tuple(self.weapon_slain_values), self.can_run, self.known_bottom,
+                              len(self.discard),
+                              self.last_event, self.rng.draws if run else None, self._deck_hash, self._hash,
+                              (action, index)))
+
+    def snapshot(self) -> int:
+        """O(1) marker of the current position; pass it to restore() to return here."""
+        self._journal_silent = True
+        return len(self._journal)
+
+    def restore(self, snapshot: int) -> None:
+        """Rolls back every action taken since snapshot(), each in O(room size)."""
+        journal = self._journal
+        while len(journal) > snapshot:
+            (room, deck_len, appended, self.health, self.weapon, slain, self.can_run, self.known_bottom, discard_len,
+             self.last_event, draws, self._deck_hash, self._hash, (action, _)) = journal.pop()
+            self.actions -= 1
+            self.runs -= action == "run"
+            deck = self.deck
+            # Cards drawn during the action sit at the end of the room, in draw order.
+            drawn = deck_len + appended - len(deck)
+            if drawn:
+                deck[:0] = self.room[len(self.room) - drawn:]
+            if appended:
+                del deck[len(deck) - appended:]
+            self.room = list(room)
+            self.weapon_slain_values = list(slain)
+            del self.discard[discard_len:]
+            if draws is not None:
+                self.rng.rewind(draws)
+        self._mask = None
+
+    def can_undo(self) -> bool:
+        return bool(self._journal)
+
+    def undo(self) -> None:
+        """Takes back the last action that changed the game."""
+        if self._journal:
+            self.restore(len(self._journal) - 1)
+
+    def history(self) -> List[Tuple[str, Optional[int]]]:
+        """The (action, room index) moves played so far, oldest first; undone moves drop out.
+
+        Silent games keep no journal until snapshot() is first called, so their history starts there.
+        """
+        return [entry[-1] for entry in self._journal]
+
+    def clone(self) -> "GameState":
+        """Independent copy that shares the immutable Card objects; the undo history is not copied."""
+        twin = copy.copy(self)
+        twin.deck, twin.room, twin.discard = list(self.deck), list(self.room), list(self.discard)
+        twin.weapon_slain_values = list(self.weapon_slain_values)
+        twin.rng = copy.copy(self.rng)
+        twin._journal, twin._journal_silent = [], False
+        return twin
+
+    def action_mask(self) -> int:
+        """Bitmask of the legal actions, cached until the room, weapon or can_run changes."""
+        if self._mask is None:
+            mask = 0
+            # can_use_weapon_on, looked up once per mask: the weapon's row of rules.weapon_ok.
+            slain = self.weapon_slain_values
+            usable = self.rules.weapon_ok[slain[-1] if slain else 0] if self.weapon else None
+            for i, card in enumerate(self.room):
+                if card.type == "monster":
+                    mask |= 1 << (FIGHT * ROOM_SLOTS + i)
+                    if usable is not None and usable[card.value]:
+                        mask |= 1 << (FIGHT_WEAPON * ROOM_SLOTS + i)
+                elif card.type == "weapon":
+                    mask |= 1 << (EQUIP * ROOM_SLOTS + i)
+                elif card.type == "potion":
+                    mask |= 1 << (DRINK * ROOM_SLOTS + i)
+                elif card.type == "merchant" and self.weapon:
+                    mask |= 1 << (SELL * ROOM_SLOTS + i)
+            if self.can_run and self.room:
+                mask |= RUN_BIT
+            self._mask = mask
+            self._legal = None
+        return self._mask
+
+    def legal_actions(self) -> Tuple[Tuple[str, Optional[int]], ...]:
+        """The (action, room index) pairs that change the game, in room order; run has index None."""
+        mask = self.action_mask()
+        if self._legal is None:
+            legal = []
+            for i in range(len(self.room)):
+                for action in (FIGHT, FIGHT_WEAPON, EQUIP, DRINK, SELL):
+                    if mask >> (action * ROOM_SLOTS + i) & 1:
+                        legal.append((ACTIONS[action], i))
+            if mask & RUN_BIT:
+                legal.append(("run", None))
+            self._legal = tuple(legal)
+        return self._legal
+
+    def play(self, action: str, index: Optional[int] = None) -> None:
+        """Applies an action by name, e.g. play("fight_weapon", 2) or play("run")."""
+        if self.hooks is not None:
+            self.hooks.play(self, action, index)
+        else:
+            self._apply(action, index)
+
+    def _apply(self, action: str, index: Optional[int]) -> None:
+        if action == "fight":
+            self.fight_monster(index)
+        elif action == "fight_weapon":
+            self.fight_monster(index, use_weapon=True)
+        elif action == "equip":
+            self.equip_weapon(index)
+        elif action == "drink":
+            self.drink_potion(index)
+        elif action == "sell":
+            self.sell_to_merchant(index)
+        elif action == "run":
+            self.run_from_room()
+        else:
+            raise ValueError(f"Unknown action {action!r}.")
 
     def is_game_over(self) -> Dict[str, Any]:
         if self.health <= 0:
@@ -0,0 +1,243 @@
+"""Optional instrumentation for the engine and app, exported in Prometheus text format.
+
+Nothing is measured until hooks are installed: ``GameState.hooks = GameHooks(registry)``
+times every play() and counts actions and game outcomes. Exporters publish a
+Registry either as a text file for node_exporter's textfile collector or on a
+local HTTP endpoint; exporter_from_spec() builds one from a setting such as
+"http://127.0.0.1:9464" or "file:/var/lib/node_exporter/scoundrel.prom".
+"""
+import bisect
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Sequence, Tuple
+
+Labels = Tuple[Tuple[str, str], ...]
+
+ACTION_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 1e-3)
+RERUN_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+HEALTH_BUCKETS = (0, 5, 10, 15, 20)
+LENGTH_BUCKETS = (10, 20, 30, 40, 60, 100)
+
+
+def _labels(labels: Dict[str, str]) -> Labels:
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    """Thread-safe set of counters, gauges and histograms that renders as Prometheus text."""
+
+    def __init__(self, prefix: str = "scoundrel"):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._values: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._buckets: Dict[str, Sequence[float]] = {}
+
+    def describe(self, name: str, kind: str, help_text: str, buckets: Sequence[float] = ()) -> None:
+        with self._lock:
+            self._help[name] = (kind, help_text)
+            if kind == "histogram":
+                self._histograms.setdefault(name, {})
+                self._buckets[name] = buckets
+            else:
+                self._values.setdefault(name, {})
+
+    def inc(self, name: str, amount: float = 1, **labels: str) -> None:
+        key = _labels(labels)
+        with self._lock:
+            series = self._values.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def set(self, name: str, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values.setdefault(name, {})[_labels(labels)] = value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = _labels(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(self._buckets.get(name, ACTION_BUCKETS))
+            histogram.observe(value)
+
+    def value(self, name: str, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(name, {}).get(_labels(labels), 0)
+
+    def render(self) -> str:
+        """The registry in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name in sorted(set(self._values) | set(self._histograms)):
+                full = f"{self.prefix}_{name}"
+                kind, help_text = self._help.get(name, ("untyped", ""))
+                if help_text:
+                    lines.append(f"# HELP {full} {help_text}")
+                lines.append(f"# TYPE {full} {kind}")
+                for labels, value in sorted(self._values.get(name, {}).items()):
+                    lines.append(f"{full}{_format_labels(labels)} {value:g}")
+                for labels, histogram in sorted(self._histograms.get(name, {}).items()):
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                        lines.append(f"{full}_bucket{_format_labels(labels, ('le', le))} {cumulative}")
+                    lines.append(f"{full}_sum{_format_labels(labels)} {histogram.sum:g}")
+                    lines.append(f"{full}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+class GameHooks:
+    """Engine hooks: install as GameState.hooks (or on one game) to time and count every play()."""
+
+    def __init__(self, registry: Registry):
+        self.registry = registry
+        registry.describe("actions_total", "counter", "Actions played, by type.")
+        registry.describe("action_seconds", "histogram", "Time spent applying an action.", ACTION_BUCKETS)
+        registry.describe("games_total", "counter", "Finished games, by result.")
+        registry.describe("final_health", "histogram", "Health when a game ends.", HEALTH_BUCKETS)
+        registry.describe("game_length_actions", "histogram", "Actions in a finished game.", LENGTH_BUCKETS)
+        registry.describe("game_runs", "histogram", "Rooms run from in a finished game.", (0, 1, 2, 4, 8))
+
+    def play(self, game, action: str, index: Optional[int]) -> None:
+        started = time.perf_counter()
+        game._apply(action, index)
+        elapsed = time.perf_counter() - started
+        self.registry.inc("actions_total", action=action)
+        self.registry.observe("action_seconds", elapsed, action=action)
+        status = game.is_game_over()
+        if status["over"]:
+            self.game_over(game, status["result"])
+
+    def game_over(self, game, result: str) -> None:
+        # The game's own counters, not history(): silent games and games rebuilt from a token keep no journal.
+        self.registry.inc("games_total", result=result)
+        self.registry.observe("final_health", game.health)
+        self.registry.observe("game_length_actions", game.actions)
+        self.registry.observe("game_runs", game.runs)
+
+
+class ActiveSessions:
+    """Counts sessions seen within the last idle_seconds."""
+
+    def __init__(self, idle_seconds: float = 600.0):
+        self.idle_seconds = idle_seconds
+        self._seen: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def touch(self, session_id: str) -> int:
+        """Marks a session as active and returns how many are active now."""
+        now = time.monotonic()
+        with self._lock:
+            seen = self._seen
+            seen[session_id] = now
+            seen.move_to_end(session_id)
+            # Least recently seen first, so pruning stops at the first live session.
+            while now - next(iter(seen.values())) > self.idle_seconds:
+                seen.popitem(last=False)
+            return len(seen)
+
+
+class TextFileExporter:
+    """Rewrites a Prometheus text file every interval seconds, atomically, from a background thread."""
+
+    def __init__(self, registry: Registry, path: str, interval: float = 15.0):
+        self.registry, self.path, self.interval = registry, path, interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="scoundrel-metrics-file", daemon=True)
+
+    def start(self) -> "TextFileExporter":
+        self._thread.start()
+        return self
+
+    def write(self) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            f.write(self.registry.render())
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, self.path)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.write()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self.write()
+
+
+class HTTPExporter:
+    """Serves the registry at /metrics from a background thread."""
+
+    def __init__(self, registry: Registry, host: str = "127.0.0.1", port: int = 9464):
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = exporter.registry.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.registry = registry
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self._thread = threading.Thread(target=self.server.serve_forever, name="scoundrel-metrics-http", daemon=True)
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+    def start(self) -> "HTTPExporter":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def exporter_from_spec(registry: Registry, spec: str):
+    """Builds an unstarted exporter from "http://host:port" or "file:path"."""
+    if spec.startswith("file:"):
+        return TextFileExporter(registry, spec[len("file:"):])
+    if spec.startswith("http://"):
+        host, _, port = spec[len("http://"):].rstrip("/").rpartition(":")
+        return HTTPExporter(registry, host or "127.0.0.1", int(port))
+    raise ValueError(f"Unknown metrics exporter {spec!r}; use http://host:port or file:path.")
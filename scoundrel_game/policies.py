@@ -0,0 +1,62 @@
+import random
+from typing import Callable, Dict, Optional, Tuple
+
+from .game_engine import GameState
+
+Action = Tuple[str, Optional[int]]
+Policy = Callable[[GameState, random.Random], Action]
+
+
+def random_policy(game: GameState, rng: random.Random) -> Action:
+    """Plays a uniformly random legal action."""
+    return rng.choice(game.legal_actions())
+
+
+def weapon_policy(game: GameState, rng: random.Random) -> Action:
+    """Plays the leftmost card, always using the weapon when can_use_weapon_on allows it."""
+    actions = game.legal_actions()
+    for action in actions:
+        if action[0] == "fight_weapon":
+            return action
+    return actions[0]
+
+
+def greedy_policy(game: GameState, rng: random.Random) -> Action:
+    """Picks the action with the best immediate health outcome, running from lethal rooms."""
+    actions = game.legal_actions()
+    weapon_value = game.weapon.value if game.weapon else 0
+    best, best_score = actions[0], None
+    for action in actions:
+        name, index = action
+        card = game.room[index] if index is not None else None
+        if name == "equip":
+            # Swap only for a stronger blade or a fresh one to replace a worn-down weapon.
+            worn = game.weapon_slain_values and game.weapon_slain_values[-1] <= card.value
+            score = (2, card.value) if card.value > weapon_value or worn else (-2, 0)
+        elif name == "drink":
+            healed = min(game.rules.max_health, game.health + card.value) - game.health
+            score = (1, healed) if healed == card.value or game.health < 10 else (-1, healed)
+        elif name == "fight_weapon":
+            # Spend the weapon on the biggest monster first; the next kill must be smaller.
+            score = (0 if card.value - weapon_value < game.health else -3, 1, card.value)
+        elif name == "fight":
+            score = (0 if card.value < game.health else -3, 0, -card.value)
+        elif name == "sell":
+            slain = game.weapon_slain_values
+            heal = game.rules.sell_heal[weapon_value][min(slain) if slain else 0]
+            score = (-1, heal)
+        else:
+            lethal = all(a[0] not in ("equip", "drink", "sell") and
+                         game.room[a[1]].value - (weapon_value if a[0] == "fight_weapon" else 0) >= game.health
+                         for a in actions if a[0] != "run")
+            score = (3, 0) if lethal else (-4, 0)
+        if best_score is None or score > best_score:
+            best, best_score = action, score
+    return best
+
+
+POLICIES: Dict[str, Policy] = {
+    "random": random_policy,
+    "greedy": greedy_policy,
+    "weapon": weapon_policy,
+}
@@ -0,0 +1,290 @@
+"""Precomputed difficulty scores for seeded dungeons, in a memory-mapped file.
+
+The file is a header followed by one fixed-width record per seed, starting at
+seed 0, so a lookup is a single read at HEADER.size + seed * RECORD.size:
+
+    verdict | best final health | greedy result | mean cards cleared in playouts
+
+The verdict and best health come from the exact solver, run under a node
+budget: "solved" means the best health is exact, "winnable" that a win was
+found (by the solver or a playout) before the budget ran out, and "undecided"
+that none was. Within the budget the best health is only as good as the search
+happened to get, so tiers come from the playouts instead: PLAYOUTS greedy
+games that each make a random move PLAYOUT_EPSILON of the time. How many cards
+they clear on average measures how forgiving the dungeon is to imperfect play,
+and stays put when the seed is scored again under another budget.
+
+Unscored records are zero bytes, which makes building resumable and
+incremental: ``python -m scoundrel_game.seed_index build seeds.idx --stop 100000``
+scores only the seeds in range that earlier, possibly interrupted, builds left
+unscored, growing the file when the range is new. Readers such as the app and
+the server pick easy, medium, hard, merely winnable or daily seeds by probing
+random records, without simulating anything per request.
+"""
+import argparse
+import datetime
+import mmap
+import os
+import random
+import struct
+import sys
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Iterator, Optional, Tuple
+
+from .game_engine import GameState
+from .policies import greedy_policy
+from .simulate import MAX_STEPS, POLICY_SALT, RESULT_CODES, RESULTS, play_game
+from .solver import solve
+
+MAGIC = b"SCNDIDX2"
+_OLD_MAGIC = b"SCNDIDX1"  # tiered by the solver's best health, which depended on the node budget
+HEADER = struct.Struct("<8sII")  # magic, record size, solver node limit
+RECORD = struct.Struct("<BBBB")
+VERDICTS = ("unscored", "unwinnable", "undecided", "winnable", "solved")
+UNSCORED, UNWINNABLE, UNDECIDED, WINNABLE, SOLVED = range(len(VERDICTS))
+TIERS = ("easy", "medium", "hard", "winnable")
+DIFFICULTIES = TIERS + ("daily",)
+DEFAULT_NODE_LIMIT = 20_000
+PLAYOUTS = 32
+PLAYOUT_EPSILON = 0.1
+# Mean cards cleared by the playouts; these split the winnable seeds among the first few hundred into
+# roughly even thirds. A seed the plain greedy bot wins is easy regardless.
+EASY_CLEARED = 29
+HARD_CLEARED = 24
+
+
+@dataclass
+class SeedScore:
+    seed: int
+    verdict: str
+    best_health: int
+    greedy_result: str
+    playout_cleared: int
+
+    @property
+    def winnable(self) -> bool:
+        return self.verdict in ("winnable", "solved")
+
+    @property
+    def tier(self) -> Optional[str]:
+        """easy, medium or hard for a seed known to be winnable; None otherwise."""
+        return _tier(RECORD.pack(VERDICTS.index(self.verdict), self.best_health,
+                                 RESULT_CODES[self.greedy_result], self.playout_cleared))
+
+
+def _tier(record: bytes) -> Optional[str]:
+    verdict, _, greedy_result, playout_cleared = RECORD.unpack(record)
+    if verdict < WINNABLE:
+        return None
+    if greedy_result == RESULT_CODES["victory"] or playout_cleared >= EASY_CLEARED:
+        return "easy"
+    return "hard" if playout_cleared < HARD_CLEARED else "medium"
+
+
+def playout(seed: int, n: int) -> Tuple[int, bool]:
+    """The cards cleared in the seed's nth playout, and whether it won."""
+    rng = random.Random((seed * PLAYOUTS + n) ^ POLICY_SALT)
+    game = GameState(seed, silent=True)
+    for _ in range(MAX_STEPS):
+        actions = game.legal_actions()
+        if game.is_game_over()["over"] or not actions:
+            break
+        game.play(*(rng.choice(actions) if rng.random() < PLAYOUT_EPSILON else greedy_policy(game, rng)))
+    return len(game.rules.deck) - len(game.deck) - len(game.room), game.is_game_over().get("result") == "victory"
+
+
+def score_seed(seed: int, node_limit: int = DEFAULT_NODE_LIMIT) -> bytes:
+    """The index record for one seed."""
+    playouts = [playout(seed, n) for n in range(PLAYOUTS)]
+    solution = solve(GameState(seed, silent=True), node_limit=node_limit)
+    if solution.winnable:
+        verdict = SOLVED if solution.complete else WINNABLE
+    elif solution.complete:
+        verdict = UNWINNABLE
+    else:
+        verdict = WINNABLE if any(won for _, won in playouts) else UNDECIDED
+    greedy = play_game(seed, "greedy")
+    return RECORD.pack(verdict, solution.best_health or 0, RESULT_CODES[greedy.result],
+                       round(sum(cleared for cleared, _ in playouts) / PLAYOUTS))
+
+
+def score_chunk(start: int, stop: int, node_limit: int = DEFAULT_NODE_LIMIT) -> bytes:
+    return b"".join(score_seed(seed, node_limit) for seed in range(start, stop))
+
+
+class SeedIndex:
+    """A seed index file mapped into memory; opened writable, it is created if missing and can grow."""
+
+    def __init__(self, path: str, writable: bool = False, node_limit: Optional[int] = None):
+        self.path = path
+        if writable and not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(HEADER.pack(MAGIC, RECORD.size, node_limit or DEFAULT_NODE_LIMIT))
+        self._file = open(path, "r+b" if writable else "rb")
+        magic, record_size, self.node_limit = HEADER.unpack(self._file.read(HEADER.size).ljust(HEADER.size, b"\0"))
+        if magic == _OLD_MAGIC:
+            self._file.close()
+            raise ValueError(f"{path} is an older seed index that tiers seeds differently; build it again.")
+        if magic != MAGIC or record_size != RECORD.size:
+            self._file.close()
+            raise ValueError(f"{path} is not a seed index.")
+        if writable and node_limit is not None and node_limit != self.node_limit:
+            self._file.close()
+            raise ValueError(f"{path} was built with a node limit of {self.node_limit}, not {node_limit}.")
+        self.writable = writable
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        """How many seeds the file has room for, scored or not."""
+        return (len(self._map) - HEADER.size) // RECORD.size
+
+    def __enter__(self) -> "SeedIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+    def _record(self, seed: int) -> bytes:
+        offset = HEADER.size + seed * RECORD.size
+        return self._map[offset:offset + RECORD.size]
+
+    def lookup(self, seed: int) -> Optional[SeedScore]:
+        """The seed's score, or None if it is outside the index or not scored yet."""
+        if not 0 <= seed < len(self):
+            return None
+        verdict, best_health, greedy_result, playout_cleared = RECORD.unpack(self._record(seed))
+        if verdict == UNSCORED:
+            return None
+        return SeedScore(seed, VERDICTS[verdict], best_health, RESULTS[greedy_result], playout_cleared)
+
+    def pick(self, tier: str, rng: Optional[random.Random] = None, attempts: int = 10_000) -> int:
+        """A random seed of the tier; every tier is common enough that a few probes find one."""
+        if tier not in TIERS:
+            raise ValueError(f"Unknown tier {tier!r}; choose from {', '.join(TIERS)}.")
+        rng = rng or random.Random()
+        for _ in range(attempts if len(self) else 0):
+            seed = rng.randrange(len(self))
+            found = _tier(self._record(seed))
+            if found is not None and (tier == "winnable" or found == tier):
+                return seed
+        raise LookupError(f"No {tier} seed found in {self.path}; build more of the index.")
+
+    def daily(self, day: Optional[datetime.date] = None, tier: str = "medium") -> int:
+        """The same seed for everyone on a given day, for as long as the index is unchanged."""
+        day = day or datetime.date.today()
+        return self.pick(tier, random.Random(day.toordinal()))
+
+    def seed_for(self, difficulty: str, rng: Optional[random.Random] = None) -> int:
+        """A seed for one of DIFFICULTIES."""
+        return self.daily() if difficulty == "daily" else self.pick(difficulty, rng)
+
+    def grow(self, seeds: int) -> None:
+        """Makes room for seeds records; the new ones are unscored."""
+        if seeds > len(self):
+            self._map.close()
+            self._file.truncate(HEADER.size + seeds * RECORD.size)
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_WRITE)
+
+    def write(self, start: int, records: bytes) -> None:
+        offset = HEADER.size + start * RECORD.size
+        self._map[offset:offset + len(records)] = records
+        self._map.flush()
+
+    def unscored(self, start: int, stop: int, chunk_size: int) -> Iterator[Tuple[int, int]]:
+        """Ranges of at most chunk_size consecutive unscored seeds within [start, stop)."""
+        lo = None
+        for seed in range(start, min(stop, len(self))):
+            if self._map[HEADER.size + seed * RECORD.size] != UNSCORED:
+                if lo is not None:
+                    yield lo, seed
+                    lo = None
+            elif lo is None:
+                lo = seed
+            elif seed - lo == chunk_size:
+                yield lo, seed
+                lo = seed
+        if lo is not None:
+            yield lo, min(stop, len(self))
+
+    def counts(self) -> Counter:
+        """How many seeds have each verdict and, for winnable ones, each tier."""
+        counts: Counter = Counter()
+        for seed in range(len(self)):
+            record = self._record(seed)
+            counts[VERDICTS[record[0]]] += 1
+            tier = _tier(record)
+            if tier is not None:
+                counts[tier] += 1
+        return counts
+
+
+def build(path: str, start: int, stop: int, workers: Optional[int] = None, node_limit: Optional[int] = None,
+          chunk_size: int = 50) -> Iterator[int]:
+    """Scores every unscored seed in [start, stop) over a process pool, yielding the count scored so far."""
+    with SeedIndex(path, writable=True, node_limit=node_limit) as index:
+        index.grow(stop)
+        workers = workers or os.cpu_count() or 1
+        scored = 0
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = {}
+            # Records are written as each chunk lands, so an interrupted build loses at most the chunks in flight.
+            for lo, hi in index.unscored(start, stop, chunk_size):
+                pending[pool.submit(score_chunk, lo, hi, index.node_limit)] = lo
+                if len(pending) >= 2 * workers:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        records = future.result()
+                        index.write(pending.pop(future), records)
+                        scored += len(records) // RECORD.size
+                        yield scored
+            for future in list(pending):
+                records = future.result()
+                index.write(pending.pop(future), records)
+                scored += len(records) // RECORD.size
+                yield scored
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Build and query the seed-difficulty index.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    make = commands.add_parser("build", help="Score the unscored seeds in a range, creating the index if needed.")
+    make.add_argument("path")
+    make.add_argument("--start", type=int, default=0)
+    make.add_argument("--stop", type=int, required=True)
+    make.add_argument("--workers", type=int, default=None)
+    make.add_argument("--node-limit", type=int, default=None,
+                      help=f"Solver positions per seed (default {DEFAULT_NODE_LIMIT}; fixed once the index exists).")
+    make.add_argument("--chunk-size", type=int, default=50)
+    stats = commands.add_parser("stats", help="Count seeds by verdict and tier.")
+    stats.add_argument("path")
+    pick = commands.add_parser("pick", help="Print a seed of the given difficulty.")
+    pick.add_argument("path")
+    pick.add_argument("difficulty", choices=DIFFICULTIES)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        started = time.perf_counter()
+        scored = 0
+        for scored in build(args.path, args.start, args.stop, args.workers, args.node_limit, args.chunk_size):
+            elapsed = time.perf_counter() - started
+            print(f"{scored} seeds scored, {scored / elapsed:.1f} seeds/s", file=sys.stderr)
+        print(f"Scored {scored} seeds in {time.perf_counter() - started:.1f}s")
+        return 0
+    with SeedIndex(args.path) as index:
+        if args.command == "stats":
+            counts = index.counts()
+            print(f"{len(index)} seeds: " + ", ".join(f"{name} {counts[name]}" for name in VERDICTS + TIERS[:3]))
+        else:
+            print(index.seed_for(args.difficulty))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
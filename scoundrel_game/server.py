@@ -0,0 +1,200 @@
+"""Standalone asyncio game service over HTTP and WebSocket.
+
+Run ``python -m scoundrel_game.server --port 8765``. Endpoints:
+
+    POST /games                  start a game ({"seed": n} or, with --seed-index,
+                                 {"difficulty": "easy"} optional) -> {"id", "state"}
+    GET  /games/{id}             -> {"id", "state"}
+    POST /games/{id}/actions     {"action": "fight", "index": 2} -> {"diff"}
+    POST /games/{id}/undo        -> {"diff"}
+    WS   /ws[?id=...]            sends {"id", "state"}, then answers each
+                                 {"action", "index"} or {"undo": true} with {"diff"}
+    GET  /healthz                session counts
+
+A diff holds only the state fields the move changed, usually two or three.
+"""
+import argparse
+import asyncio
+import contextlib
+import sys
+from typing import Any, Dict, Optional
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route, WebSocketRoute
+from starlette.websockets import WebSocket, WebSocketDisconnect
+
+from .assets import card_image_key
+from .cards import CARDS, card_code
+from .game_engine import ACTIONS, GameState
+from .seed_index import DIFFICULTIES, SeedIndex
+from .sessions import SessionStore
+
+CARD_JSON = tuple({"name": repr(card), "short": card.short_name(), "type": card.type, "value": card.value,
+                   "image": card_image_key(card)} for card in CARDS)
+
+
+def _card(card) -> Optional[Dict[str, Any]]:
+    return None if card is None else CARD_JSON[card_code(card)]
+
+
+def game_state(game: GameState) -> Dict[str, Any]:
+    status = game.is_game_over()
+    return {
+        "health": game.health,
+        "deck": len(game.deck),
+        "room": [_card(card) for card in game.room],
+        "weapon": _card(game.weapon),
+        "slain": list(game.weapon_slain_values),
+        "can_run": game.can_run,
+        "can_undo": game.can_undo(),
+        "legal": [] if status["over"] else [list(action) for action in game.legal_actions()],
+        "last_action": game.last_action,
+        "over": status["over"],
+        "result": status.get("result"),
+    }
+
+
+def state_diff(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in after.items() if before.get(key) != value}
+
+
+class GameService:
+    """Applies moves to stored sessions and reports what changed."""
+
+    def __init__(self, store: SessionStore):
+        self.store = store
+
+    def move(self, game: GameState, message: Dict[str, Any]) -> Dict[str, Any]:
+        """Applies {"action", "index"} or {"undo": true}; raises ValueError for a move that is not legal."""
+        if not isinstance(message, dict):
+            raise ValueError("Expected a JSON object.")
+        before = game_state(game)
+        if message.get("undo"):
+            if not game.can_undo():
+                raise ValueError("Nothing to undo.")
+            game.undo()
+        else:
+            if game.is_game_over()["over"]:
+                raise ValueError("The game is over; only undo is allowed.")
+            action, index = message.get("action"), message.get("index")
+            if action not in ACTIONS or (action, index) not in game.legal_actions():
+                raise ValueError(f"Illegal move {action!r} on card {index!r}.")
+            game.play(action, index)
+        return state_diff(before, game_state(game))
+
+
+def create_app(store: Optional[SessionStore] = None, sweep_interval: Optional[float] = None,
+               seeds: Optional[SeedIndex] = None) -> Starlette:
+    store = store if store is not None else SessionStore()
+    service = GameService(store)
+
+    async def create(request: Request) -> JSONResponse:
+        try:
+            body = await request.json() if await request.body() else {}
+            seed, difficulty = body.get("seed"), body.get("difficulty")
+        except (ValueError, AttributeError):
+            seed, difficulty = "", None
+        if seed is not None and (not isinstance(seed, int) or seed < 0):
+            return JSONResponse({"error": "seed must be a non-negative integer."}, status_code=400)
+        if difficulty is not None:
+            if seeds is None:
+                return JSONResponse({"error": "This server has no seed index to pick difficulties from."},
+                                    status_code=400)
+            if difficulty not in DIFFICULTIES:
+                return JSONResponse({"error": f"difficulty must be one of {', '.join(DIFFICULTIES)}."},
+                                    status_code=400)
+            try:
+                seed = seeds.seed_for(difficulty)
+            except LookupError as e:
+                return JSONResponse({"error": str(e)}, status_code=503)
+        session_id, game = store.create(seed)
+        return JSONResponse({"id": session_id, "state": game_state(game)}, status_code=201)
+
+    async def show(request: Request) -> JSONResponse:
+        session_id = request.path_params["session_id"]
+        game = store.get(session_id)
+        if game is None:
+            return JSONResponse({"error": "Unknown game."}, status_code=404)
+        return JSONResponse({"id": session_id, "state": game_state(game)})
+
+    async def act(request: Request, message: Optional[Dict[str, Any]] = None) -> JSONResponse:
+        game = store.get(request.path_params["session_id"])
+        if game is None:
+            return JSONResponse({"error": "Unknown game."}, status_code=404)
+        try:
+            return JSONResponse({"diff": service.move(game, message or await request.json())})
+        except ValueError as e:  # also covers a body that is not JSON
+            return JSONResponse({"error": str(e)}, status_code=400)
+
+    async def undo(request: Request) -> JSONResponse:
+        return await act(request, {"undo": True})
+
+    async def health(request: Request) -> JSONResponse:
+        return JSONResponse({"live": len(store), "spilled": store.spilled(), "spills": store.spills,
+                             "loads": store.loads})
+
+    async def play(websocket: WebSocket) -> None:
+        await websocket.accept()
+        session_id = websocket.query_params.get("id")
+        game = store.get(session_id) if session_id else None
+        if game is None:
+            session_id, game = store.create()
+        await websocket.send_json({"id": session_id, "state": game_state(game)})
+        try:
+            while True:
+                try:
+                    message = await websocket.receive_json()
+                    # Look the game up again: it may have been spilled while the client was idle.
+                    game = store.get(session_id) or game
+                    reply = {"diff": service.move(game, message)}
+                except ValueError as e:
+                    reply = {"error": str(e)}
+                await websocket.send_json(reply)
+        except WebSocketDisconnect:
+            pass
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        async def sweep():
+            while True:
+                await asyncio.sleep(sweep_interval or max(1.0, store.ttl / 4))
+                store.evict_idle()
+
+        sweeper = asyncio.create_task(sweep())
+        try:
+            yield
+        finally:
+            sweeper.cancel()
+            store.flush()
+
+    return Starlette(routes=[
+        Route("/games", create, methods=["POST"]),
+        Route("/games/{session_id}", show, methods=["GET"]),
+        Route("/games/{session_id}/actions", act, methods=["POST"]),
+        Route("/games/{session_id}/undo", undo, methods=["POST"]),
+        Route("/healthz", health, methods=["GET"]),
+        WebSocketRoute("/ws", play),
+    ], lifespan=lifespan)
+
+
+def main(argv=None) -> int:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve Scoundrel games over HTTP and WebSocket.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-live", type=int, default=10000, help="Sessions kept in memory.")
+    parser.add_argument("--ttl", type=float, default=900.0, help="Idle seconds before a session is spilled.")
+    parser.add_argument("--spill-dir", default=None, help="Directory for evicted sessions; drop them if unset.")
+    parser.add_argument("--seed-index", default=None, help="Seed index from scoundrel_game.seed_index, for difficulties.")
+    args = parser.parse_args(argv)
+    seeds = SeedIndex(args.seed_index) if args.seed_index else None
+    app = create_app(SessionStore(args.max_live, args.ttl, args.spill_dir), seeds=seeds)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""In-memory LRU/TTL store of live games that spills evicted sessions to disk.
+
+Live sessions are GameState objects. When the store is over capacity, or a
+session sits idle past its TTL, the session is written to spill_dir as its
+codec token (about 80 bytes) and dropped from memory; the next get() resumes
+it from the token. The undo history does not survive a spill.
+"""
+import os
+import re
+import secrets
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from .codec import decode_game, encode_game
+from .game_engine import GameState
+
+_SESSION_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class SessionStore:
+    """Maps session ids to games, keeping at most max_live of them in memory."""
+
+    def __init__(self, max_live: int = 10000, ttl: float = 900.0, spill_dir: Optional[str] = None):
+        self.max_live = max_live
+        self.ttl = ttl
+        self.spill_dir = spill_dir
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+        self._live: "OrderedDict[str, Tuple[GameState, float]]" = OrderedDict()
+        self.spills = 0
+        self.loads = 0
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    def create(self, seed: Optional[int] = None) -> Tuple[str, GameState]:
+        session_id = secrets.token_urlsafe(12)
+        game = GameState(seed)
+        self._put(session_id, game)
+        return session_id, game
+
+    def get(self, session_id: str) -> Optional[GameState]:
+        """The session's game, resumed from disk if it was spilled; None if unknown or dropped."""
+        entry = self._live.get(session_id)
+        if entry is not None:
+            self._live[session_id] = (entry[0], time.monotonic())
+            self._live.move_to_end(session_id)
+            return entry[0]
+        game = self._load(session_id)
+        if game is not None:
+            self._put(session_id, game)
+        return game
+
+    def evict_idle(self) -> int:
+        """Spills every session idle for longer than the TTL and returns how many went."""
+        cutoff = time.monotonic() - self.ttl
+        evicted = 0
+        # Least recently used first, so the sweep stops at the first session still in use.
+        while self._live and next(iter(self._live.values()))[1] < cutoff:
+            self._spill(*self._live.popitem(last=False))
+            evicted += 1
+        return evicted
+
+    def flush(self) -> None:
+        """Spills every live session, e.g. before shutting down."""
+        while self._live:
+            self._spill(*self._live.popitem(last=False))
+
+    def spilled(self) -> int:
+        return len(os.listdir(self.spill_dir)) if self.spill_dir else 0
+
+    def _put(self, session_id: str, game: GameState) -> None:
+        self._live[session_id] = (game, time.monotonic())
+        while len(self._live) > self.max_live:
+            self._spill(*self._live.popitem(last=False))
+
+    def _path(self, session_id: str) -> Optional[str]:
+        if not self.spill_dir or not _SESSION_ID.match(session_id):
+            return None
+        return os.path.join(self.spill_dir, session_id)
+
+    def _spill(self, session_id: str, entry: Tuple[GameState, float]) -> None:
+        path = self._path(session_id)
+        if path is None:
+            return
+        with open(path + ".tmp", "w") as f:
+            f.write(encode_game(entry[0]))
+        os.replace(path + ".tmp", path)
+        self.spills += 1
+
+    def _load(self, session_id: str) -> Optional[GameState]:
+        path = self._path(session_id)
+        if path is None or not os.path.exists(path):
+            return None
+        with open(path) as f:
+            game = decode_game(f.read())
+        os.remove(path)
+        self.loads += 1
+        return game
@@ -0,0 +1,205 @@
+"""Headless batch simulation of seeded Scoundrel games.
+
+Run ``python -m scoundrel_game.simulate --games 100000 --policy greedy`` to play
+seeds over a process pool and stream the aggregate results. Add
+``--rules max_health=30,room_size=5`` to play a rule variant instead.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, Optional
+
+from .game_engine import STANDARD, GameState, Rules
+from .policies import POLICIES
+
+# A Merchant left alone in the last room with no weapon to sell can never be
+# cleared, so games are cut off after this many actions.
+MAX_STEPS = 500
+# Bots draw from Random(seed ^ POLICY_SALT), so their choices do not replay the deal's own stream.
+POLICY_SALT = 0x9E3779B9
+# How a game ended; the one-byte codes that logs, indexes and tournament columns store are positions here.
+RESULTS = ("dead", "victory", "stuck", "playing")
+RESULT_CODES = {name: code for code, name in enumerate(RESULTS)}
+
+
+@dataclass
+class GameResult:
+    seed: int
+    result: str
+    health: int
+    length: int
+    runs: int
+
+
+@dataclass
+class Summary:
+    """Aggregate statistics over a batch of games; summaries from workers merge."""
+    games: int = 0
+    wins: int = 0
+    deaths: int = 0
+    stuck: int = 0
+    runs: int = 0
+    health: Counter = field(default_factory=Counter)
+    length: Counter = field(default_factory=Counter)
+
+    def add(self, game: GameResult) -> None:
+        self.games += 1
+        self.wins += game.result == "victory"
+        self.deaths += game.result == "dead"
+        self.stuck += game.result == "stuck"
+        self.runs += game.runs
+        self.health[game.health] += 1
+        self.length[game.length] += 1
+
+    def merge(self, other: "Summary") -> None:
+        self.games += other.games
+        self.wins += other.wins
+        self.deaths += other.deaths
+        self.stuck += other.stuck
+        self.runs += other.runs
+        self.health.update(other.health)
+        self.length.update(other.length)
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.games if self.games else 0.0
+
+    @property
+    def mean_length(self) -> float:
+        return sum(k * v for k, v in self.length.items()) / self.games if self.games else 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            "games": self.games,
+            "wins": self.wins,
+            "deaths": self.deaths,
+            "stuck": self.stuck,
+            "win_rate": self.win_rate,
+            "mean_length": self.mean_length,
+            "runs": self.runs,
+            "health_histogram": dict(sorted(self.health.items())),
+            "length_histogram": dict(sorted(self.length.items())),
+        }
+
+
+def play_game(seed: int, policy: str, max_steps: int = MAX_STEPS, rules: Rules = STANDARD) -> GameResult:
+    """Plays one seeded game to the end under the named policy."""
+    choose = POLICIES[policy]
+    rng = random.Random(seed ^ POLICY_SALT)
+    game = GameState(seed, silent=True, rules=rules)
+    length = runs = 0
+    while True:
+        status = game.is_game_over()
+        if status["over"]:
+            return GameResult(seed, status["result"], game.health, length, runs)
+        if length >= max_steps or not game.action_mask():
+            return GameResult(seed, "stuck", game.health, length, runs)
+        action = choose(game, rng)
+        game.play(*action)
+        runs += action[0] == "run"
+        length += 1
+
+
+def play_chunk(start: int, stop: int, policy: str, max_steps: int = MAX_STEPS, engine: str = "python",
+               rules: Rules = STANDARD) -> Summary:
+    if engine == "numpy":
+        from . import batch
+        return batch.summarize(batch.play(range(start, stop), policy, max_steps, rules))
+    summary = Summary()
+    for seed in range(start, stop):
+        summary.add(play_game(seed, policy, max_steps, rules))
+    return summary
+
+
+def simulate(games: int, policy: str = "greedy", start_seed: int = 0, workers: Optional[int] = None,
+             chunk_size: int = 1000, max_steps: int = MAX_STEPS, engine: str = "python",
+             rules: Rules = STANDARD) -> Iterator[Summary]:
+    """Fans seeds out over a process pool, yielding the running total after each chunk.
+
+    With engine="numpy" each chunk is played in lockstep by scoundrel_game.batch.
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown policy {policy!r}; choose from {', '.join(POLICIES)}.")
+    if engine == "numpy":
+        from .batch import BATCH_POLICIES
+        if policy not in BATCH_POLICIES:
+            raise ValueError(f"Policy {policy!r} has no vectorized version; choose from {', '.join(BATCH_POLICIES)}.")
+    workers = workers or os.cpu_count() or 1
+    chunks = ((lo, min(lo + chunk_size, start_seed + games))
+              for lo in range(start_seed, start_seed + games, chunk_size))
+    total = Summary()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        # Keep a bounded window of chunks in flight so huge runs stream in constant memory.
+        for lo, hi in chunks:
+            pending.add(pool.submit(play_chunk, lo, hi, policy, max_steps, engine, rules))
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    total.merge(future.result())
+                    yield total
+        for future in pending:
+            total.merge(future.result())
+            yield total
+
+
+def _rules(spec: str) -> Rules:
+    try:
+        return Rules.parse(spec)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Simulate seeded Scoundrel games under a policy.")
+    parser.add_argument("--games", type=int, default=10000)
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="greedy")
+    parser.add_argument("--start-seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--max-steps", type=int, default=MAX_STEPS)
+    parser.add_argument("--engine", choices=["python", "numpy"], default="python",
+                        help="numpy plays each chunk in lockstep as one batch.")
+    parser.add_argument("--rules", type=_rules, default=STANDARD, metavar="SPEC",
+                        help="Rule variant, e.g. max_health=30,room_size=5,red_face_cards=on,merchants=off,"
+                             "weapon_wear=equal,merchant_heal=weapon (default: standard).")
+    parser.add_argument("--json", action="store_true", help="Print the final summary as JSON.")
+    args = parser.parse_args(argv)
+    if args.engine == "numpy":
+        try:
+            from .batch import BATCH_POLICIES
+        except ImportError:
+            parser.error("--engine numpy needs NumPy.")
+        if args.policy not in BATCH_POLICIES:
+            parser.error(f"--policy {args.policy} has no vectorized version for --engine numpy; "
+                         f"choose from {', '.join(sorted(BATCH_POLICIES))}.")
+
+    started = time.perf_counter()
+    summary = Summary()
+    for summary in simulate(args.games, args.policy, args.start_seed, args.workers,
+                            args.chunk_size, args.max_steps, args.engine, args.rules):
+        elapsed = time.perf_counter() - started
+        print(f"{summary.games}/{args.games} games, win rate {summary.win_rate:.2%}, "
+              f"{summary.games / elapsed:.0f} games/s", file=sys.stderr)
+    elapsed = time.perf_counter() - started
+    if args.json:
+        print(json.dumps(dict(summary.to_dict(), policy=args.policy, engine=args.engine, rules=args.rules.spec,
+                              seconds=elapsed)))
+    else:
+        print(f"Policy: {args.policy}")
+        print(f"Rules: {args.rules.spec}")
+        print(f"Games: {summary.games} in {elapsed:.1f}s ({summary.games / elapsed:.0f} games/s)")
+        print(f"Win rate: {summary.win_rate:.2%} (deaths {summary.deaths}, stuck {summary.stuck})")
+        print(f"Mean game length: {summary.mean_length:.1f} actions, runs used: {summary.runs}")
+        print("Final health: " + ", ".join(f"{k}:{v}" for k, v in sorted(summary.health.items())))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
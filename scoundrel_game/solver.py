@@ -0,0 +1,312 @@
+"""Exact perfect-information solver for seeded Scoundrel games.
+
+The search sees the true deck order and replays the game's own RNG for every
+run_from_room reshuffle, so its verdict is exact for that seed. Positions are
+keyed on a compact byte encoding and memoized in a bounded LRU table. Given a
+tablebase, final rooms within its reach are looked up instead of searched.
+"""
+import argparse
+import copy
+import random
+import sys
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from .cards import CARD_KIND, CARD_VALUE, MERCHANT, MONSTER, POTION, WEAPON, card_code
+from .game_engine import STANDARD, GameState
+from .tablebase import Tablebase
+
+Move = Tuple[str, Optional[int]]
+
+
+class TranspositionTable:
+    """Bounded LRU map from position keys to per-health bounds on the final health.
+
+    A position's value never decreases as starting health grows, so a bound
+    proven at one health is propagated to every health it also covers.
+    """
+
+    def __init__(self, max_entries: int = 2_000_000):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self.hits = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: bytes) -> Optional[list]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return entry
+
+    def add(self, key: bytes) -> list:
+        """Returns a fresh [lower bounds, upper bounds, winning moves] entry indexed by health."""
+        size = GameState.MAX_HEALTH + 1
+        entry = self._entries[key] = [[0] * size, [GameState.MAX_HEALTH] * size, [None] * size]
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+
+class _RunShuffles:
+    """Lazily replays the game's RNG: node ids stand for positions in the stream."""
+
+    def __init__(self, rng: random.Random):
+        self._states = [rng]
+        self._children = {}
+
+    def shuffle(self, node: int, n: int) -> Tuple[int, List[int]]:
+        child = self._children.get((node, n))
+        if child is None:
+            rng = copy.copy(self._states[node])
+            order = list(range(n))
+            rng.shuffle(order)
+            self._states.append(rng)
+            child = self._children[(node, n)] = (len(self._states) - 1, order)
+        return child
+
+
+@dataclass
+class Solution:
+    winnable: bool
+    best_health: Optional[int]
+    moves: List[Move] = field(default_factory=list)
+    nodes: int = 0
+    complete: bool = True
+
+
+class _Budget(Exception):
+    pass
+
+
+class Solver:
+    """Memoized depth-first search over (deck, room, health, weapon, last slain, can_run).
+
+    Each pass asks whether the dungeon can be cleared with at least a target
+    health; the table keeps proven bounds so that later passes with a higher
+    target reuse earlier work.
+    """
+
+    def __init__(self, table_size: int = 2_000_000, node_limit: Optional[int] = None,
+                 tablebase: Optional[Tablebase] = None):
+        self.table = TranspositionTable(table_size)
+        self.node_limit = node_limit
+        self.tablebase = tablebase
+        self.nodes = 0
+
+    def solve(self, game: GameState) -> Solution:
+        if game.rules != STANDARD:
+            raise ValueError("The solver only plays the standard rules.")
+        deck = tuple(_code(card) for card in game.deck)
+        room = tuple(_code(card) for card in game.room)
+        weapon = _code(game.weapon) if game.weapon is not None else -1
+        slain = game.weapon_slain_values[-1] if len(game.weapon_slain_values) else 0
+        self._shuffles = _RunShuffles(copy.copy(game.rng))
+        self.nodes = 0
+        root = (deck, room, game.health, weapon, slain, game.can_run, 0)
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(max(limit, 10_000))
+        best, line = None, []
+        try:
+            target = 1
+            while target <= GameState.MAX_HEALTH and self._search(root, target):
+                line = self._principal_line(root, target)
+                best = self._final_health(root, line)
+                target = best + 1
+        except _Budget:
+            return Solution(best is not None, best, self._as_moves(root, line), self.nodes, complete=False)
+        finally:
+            sys.setrecursionlimit(limit)
+        return Solution(best is not None, best, self._as_moves(root, line), self.nodes)
+
+    def _principal_line(self, state, target: int) -> List[Tuple[str, int]]:
+        line = []
+        while state[0] or state[1]:
+            if self._covered(state):
+                move = self._probe(state)[1]
+                line.append(move)
+                state = self._child(state, *move)
+                continue
+            entry, health = self.table.get(_key(*state)), state[2]
+            move = entry[2][health] if entry is not None and entry[0][health] >= target else None
+            if move is None:
+                # Evicted or never stored: pick the move by searching the children, whose entries may go too.
+                move = next(m for m in self._moves(state) if self._search(self._child(state, *m), target))
+            line.append(move)
+            state = self._child(state, *move)
+        return line
+
+    def _final_health(self, state, line) -> int:
+        for move in line:
+            state = self._child(state, *move)
+        return state[2]
+
+    def _as_moves(self, state, line) -> List[Move]:
+        """Turns (action, card code) steps into the (action, room index) moves GameState takes."""
+        moves: List[Move] = []
+        for name, card in line:
+            moves.append((name, None if name == "run" else state[1].index(card)))
+            state = self._child(state, name, card)
+        return moves
+
+    def _child(self, state, name: str, card: int):
+        deck, room, health, weapon, slain, can_run, rng = state
+        if name == "run":
+            node, order = self._shuffles.shuffle(rng, len(room))
+            deck = deck + tuple(room[i] for i in order)
+            room, deck = deck[:4], deck[4:]
+            return deck, room, health, weapon, slain, False, node
+        i = room.index(card)
+        room = room[:i] + room[i + 1:]
+        value = CARD_VALUE[card]
+        if name == "fight":
+            health -= value
+        elif name == "fight_weapon":
+            health -= max(0, value - CARD_VALUE[weapon])
+            slain = value
+        elif name == "equip":
+            weapon, slain = card, 0
+        elif name == "drink":
+            health = min(GameState.MAX_HEALTH, health + value)
+        else:
+            health = min(GameState.MAX_HEALTH, health + (slain or CARD_VALUE[weapon]))
+            weapon, slain = -1, 0
+        if len(room) <= 1 and deck:
+            take = 4 - len(room)
+            room, deck, can_run = room + deck[:take], deck[take:], True
+        return deck, room, health, weapon, slain, can_run, rng
+
+    def _covered(self, state) -> bool:
+        return self.tablebase is not None and self.tablebase.covers(state[0], state[1])
+
+    def _probe(self, state):
+        _, room, health, weapon, slain, _, _ = state
+        return self.tablebase.probe(room, weapon if weapon >= 0 else None, slain, health)
+
+    def _moves(self, state) -> List[Tuple[str, int]]:
+        """Legal moves, strongest-looking first: big weapon kills, equips, potions, small fights."""
+        deck, room, health, weapon, slain, can_run, _ = state
+        moves = []
+        for card in set(room):
+            kind, value = CARD_KIND[card], CARD_VALUE[card]
+            if kind == MONSTER:
+                if weapon >= 0 and (slain == 0 or value < slain):
+                    moves.append((60 + value, "fight_weapon", card))
+                moves.append((20 - value, "fight", card))
+            elif kind == WEAPON:
+                moves.append((40 + value, "equip", card))
+            elif kind == POTION:
+                moves.append((30 + value, "drink", card))
+            elif kind == MERCHANT and weapon >= 0:
+                moves.append((1, "sell", card))
+        moves.sort(reverse=True)
+        # Running from the last room just reshuffles it back, so only runs with cards below matter.
+        if can_run and deck:
+            moves.append((0, "run", -1))
+        return [(name, card) for _, name, card in moves]
+
+    def _search(self, state, target: int) -> bool:
+        """Whether the dungeon can be cleared from state with at least target health."""
+        deck, room, health, weapon, slain, can_run, rng = state
+        if health <= 0:
+            return False
+        if not deck and not room:
+            return health >= target
+        if self._covered(state):
+            return self._probe(state)[0] >= target
+        if _upper_bound(deck, room, health, weapon, slain) < target:
+            return False
+        key = _key(*state)
+        entry = self.table.get(key)
+        if entry is None:
+            entry = self.table.add(key)
+        elif entry[0][health] >= target and entry[2][health] is not None:
+            return True
+        elif entry[1][health] < target:
+            return False
+        self.nodes += 1
+        if self.node_limit is not None and self.nodes > self.node_limit:
+            raise _Budget()
+        lower, upper, moves = entry
+        for move in self._moves(state):
+            if self._search(self._child(state, *move), target):
+                moves[health] = move
+                for h in range(health, GameState.MAX_HEALTH + 1):
+                    if lower[h] < target:
+                        lower[h] = target
+                return True
+        for h in range(1, health + 1):
+            if upper[h] >= target:
+                upper[h] = target - 1
+        return False
+
+
+def _code(card) -> int:
+    return card if isinstance(card, int) else card_code(card)
+
+
+def _upper_bound(deck, room, health, weapon, slain) -> int:
+    """Final health if every heal landed in full and only damage no weapon can absorb was taken."""
+    cards = room + deck
+    best_weapon = CARD_VALUE[weapon] if weapon >= 0 else 0
+    # A sale heals the sold weapon's last kill or its own value, so no more than the largest of those.
+    best_sale = max(best_weapon, slain)
+    for card in cards:
+        kind = CARD_KIND[card]
+        if kind == WEAPON and CARD_VALUE[card] > best_weapon:
+            best_weapon = CARD_VALUE[card]
+        if (kind == WEAPON or kind == MONSTER) and CARD_VALUE[card] > best_sale:
+            best_sale = CARD_VALUE[card]
+    heal = damage = 0
+    for card in cards:
+        kind = CARD_KIND[card]
+        if kind == POTION:
+            heal += CARD_VALUE[card]
+        elif kind == MERCHANT:
+            heal += best_sale
+        elif kind == MONSTER and CARD_VALUE[card] > best_weapon:
+            damage += CARD_VALUE[card] - best_weapon
+    return min(GameState.MAX_HEALTH, health + heal - damage)
+
+
+def _key(deck, room, health, weapon, slain, can_run, rng) -> bytes:
+    """Canonical key for everything but health; room order only matters while a run can shuffle it."""
+    if not deck:
+        room, can_run, rng = tuple(sorted(room)), False, 0
+    elif not can_run:
+        room = tuple(sorted(room))
+    return (bytes((weapon + 1, slain, can_run, len(room))) + bytes(room) + bytes(deck)
+            + rng.to_bytes(4, "little"))
+
+
+def solve(game: GameState, table_size: int = 2_000_000, node_limit: Optional[int] = None,
+          tablebase: Optional[Tablebase] = None) -> Solution:
+    """Decides whether the seeded game can be cleared and with what best final health."""
+    return Solver(table_size, node_limit, tablebase).solve(game)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Label seeded Scoundrel dungeons as winnable or not.")
+    parser.add_argument("seeds", type=int, nargs="+")
+    parser.add_argument("--table-size", type=int, default=2_000_000)
+    parser.add_argument("--node-limit", type=int, default=None)
+    parser.add_argument("--tablebase", default=None, help="Final-room tablebase from scoundrel_game.tablebase.")
+    args = parser.parse_args(argv)
+    tablebase = Tablebase(args.tablebase) if args.tablebase else None
+    for seed in args.seeds:
+        solution = solve(GameState(seed), args.table_size, args.node_limit, tablebase)
+        if solution.winnable:
+            verdict = f"winnable, best health {solution.best_health}"
+            if not solution.complete:
+                verdict += " or more (search budget exhausted)"
+        else:
+            verdict = "unwinnable" if solution.complete else "unknown (search budget exhausted)"
+        print(f"seed {seed}: {verdict} ({solution.nodes} positions)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,221 @@
+"""Endgame tablebase for the final room, stored in a memory-mapped file.
+
+Once the deck is empty, every remaining card is in the room, running only
+reshuffles the same cards, and the outcome depends on nothing but the room,
+the weapon, the last value it slew and health. Cards of the same kind and
+value play alike, so rooms are multisets of card classes. The generator works
+backwards from the empty room: a move always removes a card, so each room's
+values follow from rooms with one card fewer.
+
+For each room of at most max_cards cards, in a fixed enumeration order, the
+file holds a record of two planes over (weapon state, health 1-20): the best
+final health (0 for a loss) and the move that reaches it, as action * 4 +
+position of the card's class in the sorted room, or NO_MOVE. Generating needs
+NumPy; probing needs only the map.
+
+Run ``python -m scoundrel_game.tablebase build endgame.tb --max-cards 3``.
+"""
+import argparse
+import mmap
+import struct
+import sys
+import time
+from itertools import combinations_with_replacement
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .cards import CARD_KIND, CARD_VALUE, MERCHANT, MONSTER, POTION, WEAPON, card_code
+from .game_engine import ACTIONS, DRINK, EQUIP, FIGHT, FIGHT_WEAPON, SELL, STANDARD, GameState
+
+MAGIC = b"SCNDTB01"
+HEADER = struct.Struct("<8sB")  # magic, max cards
+NO_MOVE = 0xFF
+MAX_HEALTH = GameState.MAX_HEALTH
+
+# Card classes: monsters 2-14, weapons 2-10, potions 2-10, then the Merchant, with how many of each exist.
+CLASSES: Tuple[Tuple[int, int], ...] = tuple(
+    [(MONSTER, value) for value in range(2, 15)] + [(WEAPON, value) for value in range(2, 11)]
+    + [(POTION, value) for value in range(2, 11)] + [(MERCHANT, 0)])
+_COPIES = tuple(2 if kind in (MONSTER, MERCHANT) else 1 for kind, _ in CLASSES)
+CARD_CLASS = tuple(CLASSES.index((kind, value if kind != MERCHANT else 0))
+                   for kind, value in zip(CARD_KIND, CARD_VALUE))
+
+# Weapon states: 0 is no weapon, then each weapon value with the last value it slew (0 if none yet).
+_SLAIN = (0,) + tuple(range(2, 15))
+WEAPON_STATES = 1 + 9 * len(_SLAIN)
+_PLANE = WEAPON_STATES * MAX_HEALTH
+
+Move = Tuple[str, int]
+
+
+def weapon_state(weapon_value: int, slain: int) -> int:
+    """Index of a weapon state; weapon_value 0 means no weapon."""
+    return 0 if not weapon_value else 1 + (weapon_value - 2) * len(_SLAIN) + _SLAIN.index(slain)
+
+
+def rooms(max_cards: int) -> List[Tuple[int, ...]]:
+    """Every multiset of at most max_cards card classes that the deck can hold, in file order."""
+    found = []
+    for size in range(max_cards + 1):
+        for room in combinations_with_replacement(range(len(CLASSES)), size):
+            if all(room.count(c) <= _COPIES[c] for c in set(room)):
+                found.append(room)
+    return found
+
+
+def generate(path: str, max_cards: int = 3) -> int:
+    """Solves every final room of at most max_cards cards by retrograde analysis; returns the room count."""
+    import numpy as np
+
+    all_rooms = rooms(max_cards)
+    rank = {room: i for i, room in enumerate(all_rooms)}
+    weapon = np.zeros(WEAPON_STATES, dtype=np.int16)
+    slain = np.zeros(WEAPON_STATES, dtype=np.int16)
+    for value in range(2, 11):
+        for s in _SLAIN:
+            weapon[weapon_state(value, s)], slain[weapon_state(value, s)] = value, s
+    states = np.arange(WEAPON_STATES)[:, None]
+    health = np.arange(1, MAX_HEALTH + 1)[None, :]
+    values = np.empty((len(all_rooms), WEAPON_STATES, MAX_HEALTH), dtype=np.uint8)
+    moves = np.full((len(all_rooms), WEAPON_STATES, MAX_HEALTH), NO_MOVE, dtype=np.uint8)
+    values[rank[()]] = np.broadcast_to(health, (WEAPON_STATES, MAX_HEALTH))
+
+    def outcome(room: Tuple[int, ...], to_state, to_health, legal=True):
+        """Value of moving every (weapon state, health) to room; -1 where the move is not legal."""
+        to_state = np.broadcast_to(to_state, (WEAPON_STATES, 1))
+        reached = values[rank[room]][to_state, np.clip(to_health, 1, MAX_HEALTH) - 1].astype(np.int16)
+        return np.where(legal, np.where(to_health > 0, reached, 0), -1)
+
+    # Rooms are enumerated by size, so every child is solved before its parent.
+    for room in all_rooms[1:]:
+        candidates, codes = [], []
+        for pos, c in enumerate(room):
+            if pos and room[pos - 1] == c:
+                continue
+            kind, value = CLASSES[c]
+            rest = room[:pos] + room[pos + 1:]
+            held = weapon[:, None]
+            if kind == MONSTER:
+                candidates.append(outcome(rest, states, health - value))
+                codes.append(FIGHT * 4 + pos)
+                usable = (held > 0) & ((slain[:, None] == 0) | (value < slain[:, None]))
+                hit_state = np.where(held > 0, 1 + (held - 2) * len(_SLAIN) + _SLAIN.index(value), 0)
+                candidates.append(outcome(rest, hit_state, health - np.maximum(0, value - held), usable))
+                codes.append(FIGHT_WEAPON * 4 + pos)
+            elif kind == WEAPON:
+                candidates.append(outcome(rest, weapon_state(value, 0), health))
+                codes.append(EQUIP * 4 + pos)
+            elif kind == POTION:
+                candidates.append(outcome(rest, states, np.minimum(MAX_HEALTH, health + value)))
+                codes.append(DRINK * 4 + pos)
+            else:
+                heal = np.where(slain[:, None] > 0, slain[:, None], held)
+                candidates.append(outcome(rest, 0, np.minimum(MAX_HEALTH, health + heal), held > 0))
+                codes.append(SELL * 4 + pos)
+        stacked = np.stack(candidates)
+        best = stacked.argmax(axis=0)
+        top = np.take_along_axis(stacked, best[None], axis=0)[0]
+        values[rank[room]] = np.maximum(top, 0)
+        moves[rank[room]] = np.where(top >= 0, np.asarray(codes, dtype=np.uint8)[best], NO_MOVE)
+
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, max_cards))
+        for i in range(len(all_rooms)):
+            f.write(values[i].tobytes())
+            f.write(moves[i].tobytes())
+    return len(all_rooms)
+
+
+class Tablebase:
+    """Read-only view of a generated tablebase; probes cost a dictionary lookup and two byte reads."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        magic, self.max_cards = HEADER.unpack(self._file.read(HEADER.size).ljust(HEADER.size, b"\0"))
+        if magic != MAGIC:
+            self._file.close()
+            raise ValueError(f"{path} is not a Scoundrel tablebase.")
+        self._rank: Dict[Tuple[int, ...], int] = {room: i for i, room in enumerate(rooms(self.max_cards))}
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) != HEADER.size + len(self._rank) * 2 * _PLANE:
+            self.close()
+            raise ValueError(f"{path} is truncated or was generated differently.")
+
+    def __enter__(self) -> "Tablebase":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+    def covers(self, deck: Sequence, room: Sequence) -> bool:
+        return not deck and len(room) <= self.max_cards
+
+    def probe(self, room: Sequence[int], weapon: Optional[int], slain: int,
+              health: int) -> Tuple[int, Optional[Move]]:
+        """Best final health and a move reaching it, as (action, card code), for a final room of card codes.
+
+        weapon is the equipped card's code or None; slain is the last value it slew, 0 if none.
+        """
+        if health <= 0:
+            return 0, None
+        classes = sorted(CARD_CLASS[card] for card in room)
+        state = weapon_state(CARD_VALUE[weapon] if weapon is not None else 0, slain if weapon is not None else 0)
+        offset = HEADER.size + self._rank[tuple(classes)] * 2 * _PLANE + state * MAX_HEALTH + health - 1
+        value, move = self._map[offset], self._map[offset + _PLANE]
+        if move == NO_MOVE:
+            return value, None
+        target = classes[move % 4]
+        return value, (ACTIONS[move // 4], next(card for card in room if CARD_CLASS[card] == target))
+
+    def probe_game(self, game: GameState) -> Optional[Tuple[int, Optional[Tuple[str, int]]]]:
+        """(best final health, (action, room index)) for a covered position, or None past the horizon."""
+        if not self.covers(game.deck, game.room) or game.rules != STANDARD:
+            return None
+        codes = [card_code(card) for card in game.room]
+        weapon = card_code(game.weapon) if game.weapon is not None else None
+        slain = game.weapon_slain_values[-1] if game.weapon_slain_values else 0
+        value, move = self.probe(codes, weapon, slain, game.health)
+        return value, None if move is None else (move[0], codes.index(move[1]))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Generate or probe the final-room tablebase.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Solve every final room of up to --max-cards cards.")
+    build.add_argument("path")
+    build.add_argument("--max-cards", type=int, choices=range(1, 5), default=3,
+                       help="Room cards covered (default 3, about 30 MB; 4 covers whole final rooms in about 250 MB).")
+    probe = commands.add_parser("probe", help="Play a seed with the greedy bot until the tablebase covers it.")
+    probe.add_argument("path")
+    probe.add_argument("seeds", type=int, nargs="+")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        started = time.perf_counter()
+        count = generate(args.path, args.max_cards)
+        print(f"Solved {count} rooms in {time.perf_counter() - started:.1f}s")
+        return 0
+    import random
+    from .policies import greedy_policy
+
+    with Tablebase(args.path) as table:
+        for seed in args.seeds:
+            game = GameState(seed, silent=True)
+            while not game.is_game_over()["over"] and game.legal_actions() and table.probe_game(game) is None:
+                game.play(*greedy_policy(game, random.Random(seed)))
+            found = table.probe_game(game)
+            if found is None:
+                print(f"seed {seed}: the greedy bot's game ended before the tablebase horizon")
+                continue
+            value, move = found
+            verdict = f"win with {value} health" if value else "loss"
+            print(f"seed {seed}: {game.room} at {game.health} health -> {verdict}, play {move}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,342 @@
+"""Resumable tournaments that play several policies on the same seeds.
+
+Run ``python -m scoundrel_game.tournament run results/ --policies greedy weapon
+random --games 1000000``. Seeds are split into chunks and every (chunk, policy)
+pair is played on GameState over a process pool. Each result is written as a
+small column file, results/<policy>/<first seed>-<stop>.col:
+
+    MAGIC | rows | columns | per column: name (8 bytes), array typecode, values
+
+with one row per game and the columns in COLUMNS. Files are written under a
+temporary name and renamed into place, so a finished file is its own
+checkpoint. Rerunning the same command after an interruption plays only the
+missing files. It can also add policies or seeds to an existing directory:
+chunks always start at multiples of the chunk size from the first seed, so a
+last chunk cut short by an earlier --games is completed by playing only its
+missing seeds and replaces the shorter file.
+
+``python -m scoundrel_game.tournament report results/`` streams the files one
+chunk at a time. It reports each policy's win rate and, for every pair of
+policies, per-seed win and health deltas with confidence intervals.
+"""
+import argparse
+import json
+import math
+import os
+import struct
+import sys
+import time
+from array import array
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from itertools import combinations
+from statistics import NormalDist
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .game_engine import STANDARD, Rules
+from .policies import POLICIES
+from .simulate import MAX_STEPS, RESULT_CODES, play_game
+
+MAGIC = b"SCNDCOL1"
+HEADER = struct.Struct("<8sIB")  # magic, rows, columns
+COLUMN = struct.Struct("<8sc")  # name, array typecode
+COLUMNS = (("seed", "Q"), ("result", "B"), ("health", "b"), ("length", "H"), ("runs", "H"))
+MANIFEST = "tournament.json"
+_VICTORY = RESULT_CODES["victory"]
+
+Columns = Dict[str, array]
+
+
+def encode_columns(columns: Columns) -> bytes:
+    """Packs equal-length arrays into one column file, little-endian."""
+    rows = len(next(iter(columns.values()), ()))
+    out = bytearray(HEADER.pack(MAGIC, rows, len(columns)))
+    for name, values in columns.items():
+        if len(values) != rows:
+            raise ValueError(f"Column {name!r} has {len(values)} values, not {rows}.")
+        if sys.byteorder != "little":
+            values = array(values.typecode, values)
+            values.byteswap()
+        out += COLUMN.pack(name.encode("ascii"), values.typecode.encode("ascii")) + values.tobytes()
+    return bytes(out)
+
+
+def decode_columns(data: bytes) -> Columns:
+    """Unpacks a column file; raises ValueError if it is not one or is cut short."""
+    if len(data) < HEADER.size or data[:len(MAGIC)] != MAGIC:
+        raise ValueError("Not a column file.")
+    _, rows, count = HEADER.unpack_from(data)
+    pos, columns = HEADER.size, {}
+    for _ in range(count):
+        if pos + COLUMN.size > len(data):
+            raise ValueError("Column file is truncated.")
+        name, typecode = COLUMN.unpack_from(data, pos)
+        values = array(typecode.decode("ascii"))
+        pos += COLUMN.size
+        end = pos + rows * values.itemsize
+        if end > len(data):
+            raise ValueError("Column file is truncated.")
+        values.frombytes(data[pos:end])
+        if sys.byteorder != "little":
+            values.byteswap()
+        columns[name.rstrip(b"\0").decode("ascii")] = values
+        pos = end
+    return columns
+
+
+def play_shard(start: int, stop: int, policy: str, max_steps: int = MAX_STEPS, rules: Rules = STANDARD) -> bytes:
+    """Plays seeds [start, stop) under one policy and returns them as a column file."""
+    columns = {name: array(typecode) for name, typecode in COLUMNS}
+    for seed in range(start, stop):
+        game = play_game(seed, policy, max_steps, rules)
+        columns["seed"].append(seed)
+        columns["result"].append(RESULT_CODES[game.result])
+        columns["health"].append(game.health)
+        columns["length"].append(game.length)
+        columns["runs"].append(game.runs)
+    return encode_columns(columns)
+
+
+@dataclass
+class Settings:
+    """What the games in a results directory were played with; all its files must share these."""
+    start_seed: int = 0
+    chunk_size: int = 1000
+    max_steps: int = MAX_STEPS
+    rules: str = "standard"
+    stop_seed: int = 0
+    policies: List[str] = field(default_factory=list)
+
+    def chunks(self) -> List[Tuple[int, int]]:
+        return [(lo, min(lo + self.chunk_size, self.stop_seed))
+                for lo in range(self.start_seed, self.stop_seed, self.chunk_size)]
+
+
+def _shard_path(directory: str, policy: str, lo: int, hi: int) -> str:
+    return os.path.join(directory, policy, f"{lo:010d}-{hi:010d}.col")
+
+
+def _played_until(directory: str, policy: str, lo: int, hi: int) -> int:
+    """Where the chunk [lo, hi)'s games left off: the end of a shorter file for it, else lo."""
+    prefix = f"{lo:010d}-"
+    ends = [int(name[len(prefix):-len(".col")]) for name in os.listdir(os.path.join(directory, policy))
+            if name.startswith(prefix) and name.endswith(".col")]
+    return max([end for end in ends if end < hi], default=lo)
+
+
+def _finish_shard(directory: str, policy: str, lo: int, played: int, hi: int, data: bytes) -> None:
+    """Writes the chunk [lo, hi) from the games for [played, hi), prefixed with the shorter file's."""
+    path = _shard_path(directory, policy, lo, hi)
+    if played == lo:
+        _write_shard(path, data)
+        return
+    shorter = _shard_path(directory, policy, lo, played)
+    with open(shorter, "rb") as f:
+        columns = decode_columns(f.read())
+    for name, values in decode_columns(data).items():
+        # Widen as the newer file does, e.g. seed columns written before they were 64-bit.
+        columns[name] = array(values.typecode, columns[name])
+        columns[name].extend(values)
+    _write_shard(path, encode_columns(columns))
+    os.remove(shorter)
+
+
+def load_settings(directory: str) -> Settings:
+    with open(os.path.join(directory, MANIFEST)) as f:
+        return Settings(**json.load(f))
+
+
+def _open_tournament(directory: str, settings: Settings) -> Settings:
+    """Creates the directory or checks that it was started with the same settings, then widens it."""
+    os.makedirs(directory, exist_ok=True)
+    if os.path.exists(os.path.join(directory, MANIFEST)):
+        saved = load_settings(directory)
+        fixed = ("start_seed", "chunk_size", "max_steps", "rules")
+        for name in fixed:
+            if getattr(saved, name) != getattr(settings, name):
+                raise ValueError(f"{directory} was started with {name}={getattr(saved, name)!r}, "
+                                 f"not {getattr(settings, name)!r}; use a new directory.")
+        settings.stop_seed = max(saved.stop_seed, settings.stop_seed)
+        settings.policies = saved.policies + [p for p in settings.policies if p not in saved.policies]
+    for policy in settings.policies:
+        os.makedirs(os.path.join(directory, policy), exist_ok=True)
+    path = os.path.join(directory, MANIFEST)
+    with open(path + ".tmp", "w") as f:
+        json.dump(asdict(settings), f, indent=2)
+    os.replace(path + ".tmp", path)
+    return settings
+
+
+def _write_shard(path: str, data: bytes) -> None:
+    with open(path + ".tmp", "wb") as f:
+        f.write(data)
+    os.replace(path + ".tmp", path)
+
+
+def run(directory: str, policies: Sequence[str], games: int, start_seed: int = 0, workers: Optional[int] = None,
+        chunk_size: int = 1000, max_steps: int = MAX_STEPS, rules: Rules = STANDARD) -> Iterator[Tuple[int, int]]:
+    """Plays every missing (chunk, policy) file, yielding (files done, files in the tournament) as each lands."""
+    unknown = [policy for policy in policies if policy not in POLICIES]
+    if unknown:
+        raise ValueError(f"Unknown policy {unknown[0]!r}; choose from {', '.join(POLICIES)}.")
+    settings = _open_tournament(directory, Settings(start_seed, chunk_size, max_steps, rules.spec,
+                                                    start_seed + games, list(policies)))
+    # Chunk by chunk, so that every policy's results for a seed range land close together.
+    tasks = [(lo, hi, policy) for lo, hi in settings.chunks() for policy in policies]
+    missing = [task for task in tasks if not os.path.exists(_shard_path(directory, task[2], task[0], task[1]))]
+    done = len(tasks) - len(missing)
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = {}
+        for lo, hi, policy in missing:
+            played = _played_until(directory, policy, lo, hi)
+            pending[pool.submit(play_shard, played, hi, policy, max_steps, rules)] = (policy, lo, played, hi)
+            if len(pending) >= 2 * workers:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    _finish_shard(directory, *pending.pop(future), future.result())
+                    done += 1
+                    yield done, len(tasks)
+        for future in list(pending):
+            _finish_shard(directory, *pending.pop(future), future.result())
+            done += 1
+            yield done, len(tasks)
+
+
+def read_chunks(directory: str, policies: Sequence[str]) -> Iterator[Dict[str, Columns]]:
+    """Per seed chunk that every policy has finished, each policy's columns; one chunk in memory at a time."""
+    settings = load_settings(directory)
+    for lo, hi in settings.chunks():
+        paths = {policy: _shard_path(directory, policy, lo, hi) for policy in policies}
+        if all(os.path.exists(path) for path in paths.values()):
+            chunk = {}
+            for policy, path in paths.items():
+                with open(path, "rb") as f:
+                    chunk[policy] = decode_columns(f.read())
+            yield chunk
+
+
+class _Moments:
+    """Running count, sum and sum of squares of integer samples; exact, so no drift over billions of games."""
+
+    def __init__(self):
+        self.n = self.total = self.squares = 0
+
+    def add(self, values: Sequence[int]) -> None:
+        self.n += len(values)
+        self.total += sum(values)
+        self.squares += sum(v * v for v in values)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.n if self.n else 0.0
+
+    def interval(self, z: float) -> Tuple[float, float]:
+        """Normal-approximation confidence interval for the mean."""
+        if self.n < 2:
+            return -math.inf, math.inf
+        variance = max(0.0, (self.squares - self.total * self.total / self.n) / (self.n - 1))
+        half = z * math.sqrt(variance / self.n)
+        return self.mean - half, self.mean + half
+
+
+def _wilson(wins: int, n: int, z: float) -> Tuple[float, float]:
+    """Wilson score interval for a win rate; unlike the normal approximation it behaves near 0 and 1."""
+    if not n:
+        return 0.0, 1.0
+    p = wins / n
+    centre = (p + z * z / (2 * n)) / (1 + z * z / n)
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / (1 + z * z / n)
+    return max(0.0, centre - half), min(1.0, centre + half)
+
+
+def report(directory: str, policies: Optional[Sequence[str]] = None, confidence: float = 0.95) -> Dict:
+    """Win rates and paired per-seed deltas over the seeds every policy has finished."""
+    policies = list(policies or load_settings(directory).policies)
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    wins = {policy: _Moments() for policy in policies}
+    health = {policy: _Moments() for policy in policies}
+    pairs = list(combinations(policies, 2))
+    win_delta = {pair: _Moments() for pair in pairs}
+    health_delta = {pair: _Moments() for pair in pairs}
+    only = {pair: [0, 0] for pair in pairs}
+    for chunk in read_chunks(directory, policies):
+        won = {policy: [int(r == _VICTORY) for r in columns["result"]] for policy, columns in chunk.items()}
+        for policy in policies:
+            wins[policy].add(won[policy])
+            health[policy].add(chunk[policy]["health"])
+        for a, b in pairs:
+            deltas = [x - y for x, y in zip(won[a], won[b])]
+            win_delta[a, b].add(deltas)
+            health_delta[a, b].add([x - y for x, y in zip(chunk[a]["health"], chunk[b]["health"])])
+            only[a, b][0] += deltas.count(1)
+            only[a, b][1] += deltas.count(-1)
+    games = wins[policies[0]].n if policies else 0
+    return {
+        "games": games,
+        "confidence": confidence,
+        "policies": {policy: {"win_rate": wins[policy].mean, "win_rate_ci": _wilson(wins[policy].total, games, z),
+                              "mean_health": health[policy].mean} for policy in policies},
+        "pairs": [{"a": a, "b": b, "win_delta": win_delta[a, b].mean, "win_delta_ci": win_delta[a, b].interval(z),
+                   "only_a_won": only[a, b][0], "only_b_won": only[a, b][1],
+                   "health_delta": health_delta[a, b].mean, "health_delta_ci": health_delta[a, b].interval(z)}
+                  for a, b in pairs],
+    }
+
+
+def _print_report(summary: Dict) -> None:
+    if not summary["games"]:
+        print("No seeds have been played by every policy yet.")
+        return
+    print(f"{summary['games']} seeds played by every policy, {summary['confidence']:.0%} confidence intervals")
+    for policy, stats in summary["policies"].items():
+        lo, hi = stats["win_rate_ci"]
+        print(f"  {policy:>8}: win rate {stats['win_rate']:.2%} [{lo:.2%}, {hi:.2%}], "
+              f"mean final health {stats['mean_health']:.2f}")
+    for pair in summary["pairs"]:
+        lo, hi = pair["win_delta_ci"]
+        h_lo, h_hi = pair["health_delta_ci"]
+        print(f"  {pair['a']} - {pair['b']}: win delta {pair['win_delta']:+.2%} [{lo:+.2%}, {hi:+.2%}] "
+              f"({pair['only_a_won']} seeds only {pair['a']} won, {pair['only_b_won']} only {pair['b']}), "
+              f"health delta {pair['health_delta']:+.2f} [{h_lo:+.2f}, {h_hi:+.2f}]")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Play policies against the same seeds and compare them.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    play = commands.add_parser("run", help="Play the missing games of a tournament, creating it if needed.")
+    play.add_argument("directory")
+    play.add_argument("--policies", nargs="+", choices=sorted(POLICIES), default=sorted(POLICIES))
+    play.add_argument("--games", type=int, required=True)
+    play.add_argument("--start-seed", type=int, default=0)
+    play.add_argument("--workers", type=int, default=None)
+    play.add_argument("--chunk-size", type=int, default=1000)
+    play.add_argument("--max-steps", type=int, default=MAX_STEPS)
+    play.add_argument("--rules", default="standard", metavar="SPEC", help="Rule variant, as for simulate --rules.")
+    show = commands.add_parser("report", help="Compare the policies over the seeds they have all finished.")
+    show.add_argument("directory")
+    show.add_argument("--policies", nargs="+", default=None, help="Default: every policy in the tournament.")
+    show.add_argument("--confidence", type=float, default=0.95)
+    show.add_argument("--json", action="store_true", help="Print the report as JSON.")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "run":
+            started = time.perf_counter()
+            for done, total in run(args.directory, args.policies, args.games, args.start_seed, args.workers,
+                                   args.chunk_size, args.max_steps, Rules.parse(args.rules)):
+                print(f"{done}/{total} files, {time.perf_counter() - started:.0f}s", file=sys.stderr)
+            _print_report(report(args.directory, args.policies))
+            return 0
+        summary = report(args.directory, args.policies, args.confidence)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.json:
+        print(json.dumps(summary))
+    else:
+        _print_report(summary)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,49 @@
+import random
+
+import pytest
+
+from scoundrel_game.action_log import ActionLogWriter, read_log, replay
+from scoundrel_game.codec import decode_game, encode_game
+from scoundrel_game.game_engine import GameState
+from scoundrel_game.policies import greedy_policy
+
+
+def play(game: GameState, steps: int = 1000) -> GameState:
+    rng = random.Random(game.seed)
+    for _ in range(steps):
+        if game.is_game_over()["over"] or not game.legal_actions():
+            break
+        game.play(*greedy_policy(game, rng))
+    return game
+
+
+def test_written_games_replay_to_their_claims(tmp_path):
+    path = str(tmp_path / "games.log")
+    with ActionLogWriter(path) as writer:
+        for seed in range(20):
+            writer.write_game(play(GameState(seed)))
+    replays = [replay(claim) for claim in read_log(path)]
+    assert len(replays) == 20 and all(r.verified for r in replays)
+
+
+def test_records_reach_the_file_without_flush(tmp_path):
+    path = str(tmp_path / "games.log")
+    writer = ActionLogWriter(path)
+    try:
+        writer.write_game(play(GameState(3), steps=5))
+        assert [claim.seed for claim in read_log(path)] == [3]
+    finally:
+        writer.close()
+
+
+def test_resumed_games_are_refused(tmp_path):
+    resumed = decode_game(encode_game(play(GameState(4), steps=6)))
+    with ActionLogWriter(str(tmp_path / "games.log")) as writer:
+        with pytest.raises(ValueError, match="history"):
+            writer.write_game(resumed)
+
+
+def test_silent_games_without_a_journal_are_refused(tmp_path):
+    with ActionLogWriter(str(tmp_path / "games.log")) as writer:
+        with pytest.raises(ValueError, match="history"):
+            writer.write_game(play(GameState(4, silent=True), steps=6))
@@ -0,0 +1,75 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from scoundrel_game.advisor import Advisor, _determinize
+from scoundrel_game.game_engine import GameState
+from scoundrel_game.metrics import GameHooks, Registry
+
+
+def test_playouts_do_not_reach_installed_hooks(monkeypatch):
+    registry = Registry()
+    monkeypatch.setattr(GameState, "hooks", GameHooks(registry))
+    game = GameState(4)
+    advisor = Advisor(seed=1)
+    try:
+        hint = advisor.request(game, budget=0.2).result()
+    finally:
+        advisor.shutdown()
+    assert hint.iterations > 0
+    assert registry.value("actions_total", action=hint.action) == 0
+    game.play(hint.action, hint.index)
+    assert registry.value("actions_total", action=hint.action) == 1
+
+
+def test_cancel_drops_a_queued_search_without_waiting():
+    pool, busy = ThreadPoolExecutor(max_workers=1), threading.Event()
+    pool.submit(busy.wait, 10)
+    advisor = Advisor(executor=pool, seed=1)
+    try:
+        future = advisor.request(GameState(4, silent=True), budget=5.0)
+        started = time.monotonic()
+        advisor.cancel()
+        assert time.monotonic() - started < 0.5 and future.cancelled()
+    finally:
+        busy.set()
+        pool.shutdown()
+
+
+def test_cancel_stops_a_running_search_with_its_best_move():
+    advisor = Advisor(seed=1)
+    try:
+        future = advisor.request(GameState(4, silent=True), budget=30.0)
+        time.sleep(0.2)
+        started = time.monotonic()
+        advisor.cancel()
+        assert time.monotonic() - started < 1
+        assert future.result().iterations > 0
+    finally:
+        advisor.shutdown()
+
+
+def test_cards_run_from_stay_at_the_bottom_of_determinized_decks():
+    game = GameState(4)
+    ran_from = list(game.room)
+    game.play("run")
+    assert game.known_bottom == len(ran_from) and sorted(map(repr, game.deck[-4:])) == sorted(map(repr, ran_from))
+    rng, hidden = random.Random(1), len(game.deck) - 4
+    orders = set()
+    for _ in range(20):
+        sim = _determinize(game, rng)
+        assert sim.deck[hidden:] == game.deck[hidden:]
+        assert sorted(map(repr, sim.deck[:hidden])) == sorted(map(repr, game.deck[:hidden]))
+        orders.add(tuple(map(repr, sim.deck[:hidden])))
+    assert len(orders) == 20
+
+
+def test_known_bottom_shrinks_as_those_cards_are_drawn():
+    game, rng = GameState(4, silent=True), random.Random(4)
+    game.play("run")
+    # Play on past death, which the engine allows, until the known cards are dealt.
+    while game.deck:
+        game.play(*rng.choice([action for action in game.legal_actions() if action[0] != "run"]))
+        assert game.known_bottom == min(4, len(game.deck))
+    assert game.known_bottom == 0
@@ -0,0 +1,23 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from scoundrel_game.batch import BATCH_POLICIES, play, summarize, verify_against_engine
+from scoundrel_game.game_engine import Rules
+
+
+@pytest.mark.parametrize("policy", sorted(BATCH_POLICIES))
+def test_batch_agrees_with_game_state_seed_by_seed(policy):
+    assert verify_against_engine(range(400), policy) == []
+
+
+def test_summary_counts_every_game():
+    summary = summarize(play(range(100), "greedy"))
+    assert summary.games == 100 == summary.wins + summary.deaths + summary.stuck
+
+
+@pytest.mark.parametrize("spec", ["weapon_wear=none", "weapon_wear=equal,red_face_cards=on",
+                                  "max_health=30,room_size=6,weapon_wear=none,merchant_heal=weapon"])
+@pytest.mark.parametrize("policy", sorted(BATCH_POLICIES))
+def test_batch_agrees_with_game_state_under_rule_variants(policy, spec):
+    assert verify_against_engine(range(400), policy, rules=Rules.parse(spec)) == []
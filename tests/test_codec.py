@@ -0,0 +1,53 @@
+import base64
+import random
+import time
+
+import pytest
+
+from scoundrel_game.codec import MAX_DRAWS, decode_game, encode_game
+from scoundrel_game.game_engine import GameState
+
+
+def play_some(seed: int, steps: int) -> GameState:
+    game, rng = GameState(seed, silent=True), random.Random(seed)
+    for _ in range(steps):
+        actions = game.legal_actions()
+        if game.is_game_over()["over"] or not actions:
+            break
+        game.play(*rng.choice(actions))
+    return game
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_round_trip_keeps_position_and_rng(seed):
+    game = play_some(seed, seed * 3)
+    restored = decode_game(encode_game(game))
+    assert restored.position_hash() == game.position_hash()
+    assert restored.rng.position() == game.rng.position()
+    assert restored.rng.getrandbits(32) == game.rng.getrandbits(32)
+    assert (restored.actions, restored.runs, restored.known_bottom) == (game.actions, game.runs, game.known_bottom)
+
+
+def test_version_1_tokens_decode_with_no_counts():
+    game = play_some(3, 9)
+    data = bytearray(base64.urlsafe_b64decode(encode_game(game) + "=" * (-len(encode_game(game)) % 4)))
+    data[0] = 1
+    del data[-3:]  # the action, run and known card counts, each one varint byte here
+    restored = decode_game(base64.urlsafe_b64encode(bytes(data)).rstrip(b"=").decode("ascii"))
+    assert restored.position_hash() == game.position_hash() and (restored.actions, restored.runs, restored.known_bottom) == (0, 0, 0)
+
+
+def test_huge_draw_count_is_rejected_without_replaying():
+    game = GameState(7, silent=True)
+    game.rng.draws = 10 ** 12
+    token = encode_game(game)
+    start = time.perf_counter()
+    with pytest.raises(ValueError, match="Invalid game token"):
+        decode_game(token)
+    assert time.perf_counter() - start < 1
+
+
+def test_draw_count_at_the_bound_decodes():
+    game = GameState(7, silent=True)
+    game.rng.draws = MAX_DRAWS
+    assert decode_game(encode_game(game)).rng.position() == (7, MAX_DRAWS)
@@ -0,0 +1,38 @@
+import random
+
+from scoundrel_game.codec import decode_game, encode_game
+from scoundrel_game.game_engine import GameState
+from scoundrel_game.metrics import GameHooks, Registry
+
+
+def histogram_sum(registry: Registry, name: str) -> float:
+    line = next(line for line in registry.render().splitlines() if line.startswith(f"scoundrel_{name}_sum "))
+    return float(line.split()[1])
+
+
+def test_game_length_counts_moves_made_before_a_token_rebuild():
+    registry = Registry()
+    hooks = GameHooks(registry)
+    game, rng, moves, runs = GameState(11), random.Random(11), 0, 0
+    game.hooks = hooks
+    while not game.is_game_over()["over"] and game.legal_actions():
+        if moves == 12:
+            # The app and the server's spilled sessions resume from a token, which carries no undo journal.
+            game = decode_game(encode_game(game))
+            game.hooks = hooks
+        action = ("run", None) if ("run", None) in game.legal_actions() and rng.random() < 0.3 \
+            else rng.choice(game.legal_actions())
+        moves, runs = moves + 1, runs + (action[0] == "run")
+        game.play(*action)
+    assert game.is_game_over()["over"] and moves > 12
+    assert histogram_sum(registry, "game_length_actions") == moves
+    assert histogram_sum(registry, "game_runs") == runs > 0
+
+
+def test_silent_games_report_their_length():
+    registry = Registry()
+    game = GameState(4, silent=True)
+    game.hooks = GameHooks(registry)
+    while not game.is_game_over()["over"] and game.legal_actions():
+        game.play(*game.legal_actions()[0])
+    assert game.history() == [] and histogram_sum(registry, "game_length_actions") == game.actions > 0
@@ -0,0 +1,27 @@
+import random
+
+import pytest
+
+from scoundrel_game.game_engine import STANDARD, GameState, Rules
+
+
+def rehashed(game: GameState) -> int:
+    twin = game.clone()
+    twin.rehash()
+    return twin.position_hash()
+
+
+@pytest.mark.parametrize("rules", [STANDARD, Rules(red_face_cards=True, weapon_wear="none")])
+def test_incremental_hash_matches_rehash_while_playing_on_after_death(rules):
+    rng, lowest = random.Random(5), 0
+    for seed in range(100):
+        game = GameState(seed, silent=True, rules=rules)
+        while game.legal_actions():
+            # Fight barehanded whenever possible, so health runs far below zero before the deck is out.
+            fights = [action for action in game.legal_actions() if action[0] == "fight"]
+            game.play(*rng.choice(fights or game.legal_actions()))
+            assert game.position_hash() == rehashed(game)
+        lowest = min(lowest, game.health)
+    if rules is STANDARD:
+        assert lowest < -128  # below the range the health keys used to cover
+
@@ -0,0 +1,34 @@
+import pytest
+
+from scoundrel_game.game_engine import Card, GameState, Rules
+
+
+def selling(rules: Rules, slain) -> int:
+    """Health gained by selling a 9 of diamonds that slew the given values, from 1 health."""
+    game = GameState(0, rules=rules)
+    game.room = [Card("joker", None, joker_id=1)]
+    game.weapon, game.weapon_slain_values, game.health, game._mask = Card("diamonds", 9), list(slain), 1, None
+    game.rehash()
+    game.play("sell", 0)
+    return game.health - 1
+
+
+@pytest.mark.parametrize("spec, slain, heal", [
+    ("standard", [], 9),
+    ("standard", [12, 5], 5),
+    ("weapon_wear=none", [4, 13], 4),
+    ("weapon_wear=none,merchant_heal=weapon", [4, 13], 9),
+])
+def test_merchant_heals_the_smallest_kill(spec, slain, heal):
+    assert selling(Rules.parse(spec), slain) == heal
+
+
+def test_position_hash_tells_apart_the_smallest_kill():
+    rules = Rules(weapon_wear="none")
+    hashes = set()
+    for slain in ([4, 13], [6, 13], [13]):
+        game = GameState(0, rules=rules)
+        game.weapon, game.weapon_slain_values = Card("diamonds", 9), slain
+        game.rehash()
+        hashes.add(game.position_hash())
+    assert len(hashes) == 3
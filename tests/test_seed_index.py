@@ -0,0 +1,134 @@
+import datetime
+import random
+
+import pytest
+
+from scoundrel_game.seed_index import (HEADER, RECORD, SOLVED, UNWINNABLE, WINNABLE, SeedIndex, build, main,
+                                       score_seed)
+from scoundrel_game.simulate import RESULT_CODES
+
+NODE_LIMIT = 300
+
+
+def build_all(path, start, stop):
+    scored = 0
+    for scored in build(str(path), start, stop, workers=2, node_limit=NODE_LIMIT, chunk_size=3):
+        pass
+    return scored
+
+
+def test_build_stores_each_seeds_score(tmp_path):
+    path = tmp_path / "seeds.idx"
+    assert build_all(path, 0, 8) == 8
+    with SeedIndex(str(path)) as index:
+        assert len(index) == 8 and index.node_limit == NODE_LIMIT
+        assert [index._record(seed) for seed in range(8)] == [score_seed(seed, NODE_LIMIT) for seed in range(8)]
+        assert sum(index.counts()[name] for name in ("unwinnable", "undecided", "winnable", "solved")) == 8
+
+
+def test_rebuilding_scores_only_what_is_missing(tmp_path):
+    path = tmp_path / "seeds.idx"
+    build_all(path, 0, 6)
+    with SeedIndex(str(path), writable=True) as index:
+        kept = index._record(1)
+        index.write(4, bytes(RECORD.size))  # as if the build had been interrupted with seed 4 in flight
+        assert list(index.unscored(0, 10, 3)) == [(4, 5)]
+    assert build_all(path, 0, 9) == 1 + 3
+    with SeedIndex(str(path)) as index:
+        assert len(index) == 9 and not list(index.unscored(0, 9, 3))
+        assert index._record(1) == kept and index._record(4) == score_seed(4, NODE_LIMIT)
+
+
+def test_unscored_splits_gaps_into_chunks(tmp_path):
+    with SeedIndex(str(tmp_path / "seeds.idx"), writable=True) as index:
+        index.grow(10)
+        index.write(6, RECORD.pack(SOLVED, 5, 0, 20))
+        assert list(index.unscored(0, 10, 4)) == [(0, 4), (4, 6), (7, 10)]
+        assert list(index.unscored(2, 5, 4)) == [(2, 5)]
+
+
+def test_grow_adds_unscored_records_and_never_shrinks(tmp_path):
+    path = tmp_path / "seeds.idx"
+    with SeedIndex(str(path), writable=True) as index:
+        assert len(index) == 0
+        index.grow(5)
+        index.write(2, RECORD.pack(SOLVED, 5, 0, 20))
+        index.grow(3)
+        assert len(index) == 5 and index.lookup(2).verdict == "solved"
+        assert [index.lookup(seed) for seed in (0, 4, 5)] == [None, None, None]
+    assert path.stat().st_size == HEADER.size + 5 * RECORD.size
+
+
+def test_node_limit_is_fixed_once_the_index_exists(tmp_path):
+    path = tmp_path / "seeds.idx"
+    build_all(path, 0, 2)
+    with pytest.raises(ValueError, match="node limit of 300"):
+        list(build(str(path), 0, 4, workers=1, node_limit=NODE_LIMIT * 2))
+    with SeedIndex(str(path), writable=True) as index:  # no limit given: the stored one applies
+        assert index.node_limit == NODE_LIMIT
+
+
+def test_files_of_another_format_are_refused(tmp_path):
+    path = tmp_path / "seeds.idx"
+    path.write_bytes(HEADER.pack(b"SCNDIDX1", RECORD.size, NODE_LIMIT))
+    with pytest.raises(ValueError, match="build it again"):
+        SeedIndex(str(path))
+    path.write_bytes(b"not an index")
+    with pytest.raises(ValueError, match="not a seed index"):
+        SeedIndex(str(path))
+
+
+@pytest.fixture
+def tiered(tmp_path):
+    """One seed of each tier, among unwinnable and unscored ones."""
+    loss, win = RESULT_CODES["dead"], RESULT_CODES["victory"]
+    records = [RECORD.pack(UNWINNABLE, 0, loss, 30), bytes(RECORD.size),
+               RECORD.pack(WINNABLE, 2, loss, 31),  # easy despite a poor best health from the budget
+               RECORD.pack(SOLVED, 20, loss, 26), RECORD.pack(SOLVED, 20, loss, 12),
+               RECORD.pack(WINNABLE, 1, win, 10)]  # the greedy bot wins it, so it is easy
+    with SeedIndex(str(tmp_path / "seeds.idx"), writable=True) as index:
+        index.grow(len(records))
+        index.write(0, b"".join(records))
+    with SeedIndex(str(tmp_path / "seeds.idx")) as index:
+        yield index
+
+
+def test_tiers_come_from_the_playouts(tiered):
+    assert [tiered.lookup(seed) and tiered.lookup(seed).tier for seed in range(6)] == \
+        [None, None, "easy", "medium", "hard", "easy"]
+    counts = tiered.counts()
+    assert (counts["easy"], counts["medium"], counts["hard"], counts["unscored"]) == (2, 1, 1, 1)
+
+
+def test_pick_finds_seeds_of_the_tier(tiered):
+    rng = random.Random(0)
+    assert {tiered.pick("easy", rng) for _ in range(50)} == {2, 5}
+    assert tiered.pick("medium", rng) == 3 and tiered.pick("hard", rng) == 4
+    assert {tiered.pick("winnable", rng) for _ in range(50)} == {2, 3, 4, 5}
+    with pytest.raises(ValueError, match="Unknown tier"):
+        tiered.pick("impossible")
+
+
+def test_pick_gives_up_when_no_seed_has_the_tier(tmp_path):
+    with SeedIndex(str(tmp_path / "seeds.idx"), writable=True) as index:
+        index.grow(3)
+        with pytest.raises(LookupError):
+            index.pick("easy", attempts=20)
+
+
+def test_daily_seed_is_the_same_all_day(tiered):
+    day = datetime.date(2026, 10, 17)
+    assert tiered.daily(day) == tiered.daily(day) == 3
+    assert tiered.lookup(tiered.daily(day, tier="easy")).tier == "easy"
+
+
+def test_cli_picks_a_seed_of_the_difficulty(tiered, capsys):
+    assert main(["pick", tiered.path, "hard"]) == 0
+    assert capsys.readouterr().out.strip() == "4"
+    assert main(["stats", tiered.path]) == 0
+    assert "6 seeds" in capsys.readouterr().out
+
+
+def test_tier_signal_does_not_depend_on_the_node_budget():
+    for seed in range(3):
+        assert score_seed(seed, NODE_LIMIT)[2:] == score_seed(seed, NODE_LIMIT * 10)[2:]
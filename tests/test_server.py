@@ -0,0 +1,31 @@
+import pytest
+
+pytest.importorskip("starlette")
+
+from scoundrel_game.game_engine import GameState
+from scoundrel_game.server import GameService, game_state
+from scoundrel_game.sessions import SessionStore
+
+
+def fight_until_dead(service: GameService, game: GameState) -> None:
+    while game.health > 0:
+        index = next(index for action, index in game.legal_actions() if action == "fight")
+        service.move(game, {"action": "fight", "index": index})
+
+
+def test_moves_after_death_are_rejected():
+    service, game = GameService(SessionStore()), GameState(5)
+    fight_until_dead(service, game)
+    health, state = game.health, game_state(game)
+    assert state["over"] and state["result"] == "dead" and state["legal"] == []
+    assert game.legal_actions(), "the engine itself still lists the room's cards"
+    with pytest.raises(ValueError, match="game is over"):
+        service.move(game, {"action": game.legal_actions()[0][0], "index": game.legal_actions()[0][1]})
+    assert game.health == health
+
+
+def test_undo_after_death_is_allowed():
+    service, game = GameService(SessionStore()), GameState(5)
+    fight_until_dead(service, game)
+    diff = service.move(game, {"undo": True})
+    assert diff["over"] is False and game.health > 0
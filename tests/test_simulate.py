@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+from scoundrel_game.game_engine import STANDARD, Rules
+from scoundrel_game.simulate import Summary, main, play_chunk, play_game, simulate
+
+
+def test_numpy_engine_rejects_a_policy_without_a_batch_version(capsys):
+    pytest.importorskip("numpy")
+    with pytest.raises(SystemExit) as exit_info:
+        main(["--engine", "numpy", "--policy", "random", "--games", "10"])
+    assert exit_info.value.code == 2
+    assert "no vectorized version" in capsys.readouterr().err
+
+
+def test_numpy_engine_runs_a_batch_policy(capsys):
+    pytest.importorskip("numpy")
+    assert main(["--engine", "numpy", "--policy", "weapon", "--games", "50", "--workers", "1"]) == 0
+    assert "Games: 50" in capsys.readouterr().out
+
+
+def test_simulate_totals_every_seed_once():
+    counts, total = [], Summary()
+    for total in simulate(30, "greedy", start_seed=5, workers=2, chunk_size=7):
+        counts.append(total.games)
+    assert sorted(counts) == counts and len(counts) == 5 and counts[-1] == 30
+    expected = Summary()
+    for seed in range(5, 35):
+        expected.add(play_game(seed, "greedy"))
+    assert total.to_dict() == expected.to_dict()
+
+
+def test_play_game_is_deterministic_per_seed_and_policy():
+    for seed in range(10):
+        game = play_game(seed, "random")
+        assert game == play_game(seed, "random")
+        assert (game.result == "victory") == (game.health > 0 and game.result != "stuck")
+        assert 0 <= game.runs <= game.length
+
+
+def test_play_game_stops_at_max_steps():
+    assert play_game(4, "weapon").length > 5
+    game = play_game(4, "weapon", max_steps=5)
+    assert (game.result, game.length) == ("stuck", 5)
+
+
+def test_simulate_rejects_an_unknown_policy():
+    with pytest.raises(ValueError, match="Unknown policy"):
+        next(simulate(10, "cautious"))
+
+
+def test_python_engine_cli_prints_json(capsys):
+    assert main(["--games", "20", "--workers", "1", "--policy", "weapon", "--json"]) == 0
+    result = json.loads(capsys.readouterr().out)
+    assert (result["games"], result["engine"], result["policy"]) == (20, "python", "weapon")
+    assert result["wins"] + result["deaths"] + result["stuck"] == 20
+
+
+@pytest.mark.parametrize("policy", ["greedy", "weapon"])
+@pytest.mark.parametrize("rules", [STANDARD, Rules(max_health=30, room_size=5)])
+def test_numpy_and_python_engines_agree_on_fixed_seeds(policy, rules):
+    pytest.importorskip("numpy")
+    python = play_chunk(100, 400, policy, engine="python", rules=rules)
+    numpy = play_chunk(100, 400, policy, engine="numpy", rules=rules)
+    assert numpy.to_dict() == python.to_dict() and python.games == 300
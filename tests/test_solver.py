@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+from scoundrel_game.cards import CARDS, CARD_KIND, WEAPON
+from scoundrel_game.game_engine import Card, GameState
+from scoundrel_game.solver import solve
+
+
+def position(deck, room, weapon=None, slain=(), health=20, can_run=True) -> GameState:
+    game = GameState(0, silent=True)
+    game.deck, game.room = list(deck), list(room)
+    game.weapon, game.weapon_slain_values = weapon, list(slain)
+    game.health, game.can_run, game._mask = health, can_run, None
+    game.rehash()
+    return game
+
+
+def best_health(game: GameState) -> int:
+    """Exhaustive search over GameState itself: the best final health, 0 if every line dies or gets stuck."""
+    if game.health <= 0:
+        return 0
+    if not game.deck and not game.room:
+        return game.health
+    best = 0
+    for action in game.legal_actions():
+        child = game.clone()
+        child.play(*action)
+        best = max(best, best_health(child))
+    return best
+
+
+def random_position(rng: random.Random) -> GameState:
+    cards = rng.sample(range(len(CARDS)), rng.randint(2, 6))
+    room, deck = [CARDS[code] for code in cards[:4]], [CARDS[code] for code in cards[4:]]
+    weapons = [CARDS[code] for code in range(len(CARDS)) if CARD_KIND[code] == WEAPON and code not in cards]
+    weapon = rng.choice(weapons) if rng.random() < 0.7 else None
+    slain = [rng.randint(2, 14)] if weapon is not None and rng.random() < 0.6 else []
+    return position(deck, room, weapon, slain, rng.randint(1, 20), rng.random() < 0.5)
+
+
+def test_merchant_sale_can_heal_more_than_ten():
+    game = position([], [Card("joker", None, joker_id=1), Card("clubs", "A")], Card("diamonds", 2), [14], health=1)
+    solution = solve(game)
+    assert solution.winnable and solution.complete and solution.best_health == 1
+
+
+@pytest.mark.parametrize("table_size", [2_000_000, 1])
+@pytest.mark.parametrize("seed", range(4))
+def test_solver_matches_exhaustive_search(seed, table_size):
+    rng = random.Random(seed)
+    for _ in range(60):
+        game = random_position(rng)
+        expected = best_health(game.clone())
+        solution = solve(game, table_size=table_size)
+        assert solution.complete
+        assert (solution.best_health or 0) == expected, (game.deck, game.room, game.weapon, game.weapon_slain_values)
+        if solution.winnable:
+            replay = game.clone()
+            for move in solution.moves:
+                replay.play(*move)
+            assert replay.is_game_over()["result"] == "victory" and replay.health == expected
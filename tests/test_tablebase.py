@@ -0,0 +1,83 @@
+import random
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from scoundrel_game.game_engine import STANDARD, GameState
+from scoundrel_game.policies import greedy_policy
+from scoundrel_game.solver import solve
+from scoundrel_game.tablebase import Tablebase, generate
+
+MAX_CARDS = 2
+
+
+@pytest.fixture(scope="module")
+def table(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("tablebase") / "endgame.tb")
+    generate(path, MAX_CARDS)
+    with Tablebase(path) as table:
+        yield table
+
+
+def final_room(rng: random.Random) -> GameState:
+    """A random position with the deck used up and at most MAX_CARDS cards left in the room."""
+    cards = list(STANDARD.deck)
+    rng.shuffle(cards)
+    game = GameState(0, silent=True)
+    game.deck, game.room = [], cards[:rng.randint(1, MAX_CARDS)]
+    weapons = [card for card in cards[MAX_CARDS:] if card.type == "weapon"]
+    game.weapon = rng.choice(weapons + [None])
+    kills = sorted(rng.sample(range(2, 15), rng.randint(0, 3)), reverse=True)
+    game.weapon_slain_values = kills if game.weapon else []
+    game.health, game.can_run = rng.randint(1, STANDARD.max_health), rng.random() < 0.5
+    game.rehash()
+    return game
+
+
+def best_health(game: GameState) -> int:
+    """Exhaustive search: the best final health reachable, 0 if every line dies or gets stuck."""
+    if game.health <= 0:
+        return 0
+    if not game.room:
+        return game.health
+    best = 0
+    for action in game.legal_actions():
+        child = game.clone()
+        child.play(*action)
+        best = max(best, best_health(child))
+    return best
+
+
+def test_probes_match_exhaustive_search(table):
+    rng = random.Random(1)
+    for _ in range(400):
+        game = final_room(rng)
+        value, move = table.probe_game(game)
+        assert value == best_health(game), (game.room, game.weapon, game.weapon_slain_values, game.health)
+        if move is None:
+            assert value == 0 or not game.legal_actions()
+        else:
+            game.play(*move)
+            assert best_health(game) == value
+
+
+def test_positions_beyond_the_horizon_are_not_probed(table):
+    game = GameState(3, silent=True)
+    assert table.probe_game(game) is None
+    game.deck, game.room = [], list(game.room[:MAX_CARDS + 1])
+    assert table.probe_game(game) is None
+
+
+# Greedy play from these seeds leaves a winnable position eight cards from the end for 0, 6, 9, 12, 15, 19 and 27.
+@pytest.mark.parametrize("seed", range(30))
+def test_solver_agrees_with_and_without_the_tablebase(table, seed):
+    game, rng = GameState(seed, silent=True), random.Random(seed)
+    while len(game.deck) > 8 and not game.is_game_over()["over"] and game.legal_actions():
+        game.play(*greedy_policy(game, rng))
+    plain, probed = solve(game.clone()), solve(game.clone(), tablebase=table)
+    assert (probed.winnable, probed.best_health) == (plain.winnable, plain.best_health)
+    for move in probed.moves:
+        game.play(*move)
+    if probed.winnable:
+        assert game.is_game_over()["result"] == "victory" and game.health == probed.best_health
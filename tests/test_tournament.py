@@ -0,0 +1,92 @@
+import os
+
+import pytest
+
+from scoundrel_game.simulate import play_game
+from scoundrel_game.tournament import decode_columns, main, play_shard, report, run
+
+POLICIES = ["greedy", "weapon"]
+
+
+def play(directory, games, **kwargs):
+    return list(run(str(directory), POLICIES, games, workers=2, chunk_size=10, **kwargs))
+
+
+def files(directory, policy):
+    return sorted(os.listdir(directory / policy))
+
+
+def column(directory, policy, name, column_name="seed"):
+    with open(directory / policy / name, "rb") as f:
+        return list(decode_columns(f.read())[column_name])
+
+
+def test_run_writes_one_file_per_chunk_and_policy(tmp_path):
+    progress = play(tmp_path, 25)
+    assert progress[-1] == (6, 6)
+    assert files(tmp_path, "greedy") == ["0000000000-0000000010.col", "0000000010-0000000020.col",
+                                         "0000000020-0000000025.col"]
+    assert column(tmp_path, "weapon", "0000000010-0000000020.col") == list(range(10, 20))
+    assert column(tmp_path, "greedy", "0000000020-0000000025.col", "health") == \
+        [play_game(seed, "greedy").health for seed in range(20, 25)]
+
+
+def test_interrupted_run_resumes_with_the_missing_files(tmp_path):
+    games = run(str(tmp_path), POLICIES, 60, workers=1, chunk_size=10)
+    assert next(games)[0] == 1
+    games.close()
+    written = len(files(tmp_path, "greedy")) + len(files(tmp_path, "weapon"))
+    assert 1 <= written < 12
+    os.remove(tmp_path / "greedy" / "0000000000-0000000010.col")
+    progress = play(tmp_path, 60)
+    assert progress[0] == (written, 12) and progress[-1] == (12, 12)
+    assert not [name for name in files(tmp_path, "greedy") if name.endswith(".tmp")]
+    assert report(str(tmp_path))["games"] == 60
+
+
+def test_extending_the_range_completes_the_short_last_chunk(tmp_path):
+    play(tmp_path, 15)
+    with open(tmp_path / "greedy" / "0000000010-0000000015.col", "rb") as f:
+        kept = decode_columns(f.read())
+    progress = play(tmp_path, 25)
+    assert progress[-1] == (6, 6)
+    assert files(tmp_path, "greedy") == ["0000000000-0000000010.col", "0000000010-0000000020.col",
+                                         "0000000020-0000000025.col"]
+    with open(tmp_path / "greedy" / "0000000010-0000000020.col", "rb") as f:
+        merged = decode_columns(f.read())
+    assert merged == decode_columns(play_shard(10, 20, "greedy"))
+    assert all(merged[name][:5] == values for name, values in kept.items())
+    assert report(str(tmp_path))["games"] == 25
+
+
+def test_seeds_beyond_32_bits_are_stored_exactly():
+    seeds = decode_columns(play_shard(2 ** 32 - 1, 2 ** 32 + 2, "greedy"))["seed"]
+    assert list(seeds) == [2 ** 32 - 1, 2 ** 32, 2 ** 32 + 1]
+
+
+def test_report_totals_match_the_games_played(tmp_path):
+    play(tmp_path, 40)
+    summary = report(str(tmp_path), confidence=0.9)
+    results = {policy: [play_game(seed, policy) for seed in range(40)] for policy in POLICIES}
+    wins = {policy: [game.result == "victory" for game in games] for policy, games in results.items()}
+    assert summary["games"] == 40
+    for policy in POLICIES:
+        stats = summary["policies"][policy]
+        assert stats["win_rate"] == sum(wins[policy]) / 40
+        assert stats["mean_health"] == sum(game.health for game in results[policy]) / 40
+        assert stats["win_rate_ci"][0] <= stats["win_rate"] <= stats["win_rate_ci"][1]
+    (pair,) = summary["pairs"]
+    assert (pair["a"], pair["b"]) == ("greedy", "weapon")
+    assert pair["only_a_won"] == sum(a and not b for a, b in zip(wins["greedy"], wins["weapon"]))
+    assert pair["only_b_won"] == sum(b and not a for a, b in zip(wins["greedy"], wins["weapon"]))
+    assert pair["win_delta"] == (pair["only_a_won"] - pair["only_b_won"]) / 40
+    assert pair["health_delta_ci"][0] <= pair["health_delta"] <= pair["health_delta_ci"][1]
+
+
+def test_changed_settings_need_a_new_directory(tmp_path, capsys):
+    play(tmp_path, 10)
+    with pytest.raises(ValueError, match="chunk_size=10"):
+        list(run(str(tmp_path), POLICIES, 10, workers=1, chunk_size=20))
+    with pytest.raises(SystemExit):
+        main(["run", str(tmp_path), "--games", "10", "--chunk-size", "20", "--workers", "1"])
+    assert "use a new directory" in capsys.readouterr().err
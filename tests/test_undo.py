@@ -0,0 +1,57 @@
+import random
+
+import pytest
+
+from scoundrel_game.game_engine import GameState
+
+
+def fingerprint(game: GameState) -> tuple:
+    return (list(map(repr, game.deck)), list(map(repr, game.room)), list(map(repr, game.discard)), game.health,
+            repr(game.weapon), list(game.weapon_slain_values), game.can_run, game.last_action,
+            game.rng.position(), game.position_hash(), game.actions, game.runs,
+            game.known_bottom)
+
+
+def play_randomly(game: GameState, rng: random.Random, steps: int) -> None:
+    for _ in range(steps):
+        if game.is_game_over()["over"] or not game.legal_actions():
+            return
+        legal = game.legal_actions()
+        game.play(*(("run", None) if ("run", None) in legal and rng.random() < 0.3 else rng.choice(legal)))
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_undo_returns_to_every_earlier_position(seed):
+    rng, game = random.Random(seed), GameState(seed)
+    seen = [fingerprint(game)]
+    while not game.is_game_over()["over"] and game.legal_actions():
+        play_randomly(game, rng, 1)
+        seen.append(fingerprint(game))
+    for expected in reversed(seen[:-1]):
+        game.undo()
+        assert fingerprint(game) == expected
+    assert not game.can_undo()
+    # The rewound RNG plays on exactly like a fresh game's.
+    fresh = GameState(seed)
+    assert game.rng.getrandbits(32) == fresh.rng.getrandbits(32)
+
+
+def test_silent_games_journal_only_after_snapshot():
+    rng, game = random.Random(1), GameState(3, silent=True)
+    play_randomly(game, rng, 5)
+    assert not game.can_undo() and game.history() == []
+    before = fingerprint(game)
+    mark = game.snapshot()
+    play_randomly(game, rng, 8)
+    assert len(game.history()) > 0
+    game.restore(mark)
+    assert fingerprint(game) == before
+
+
+def test_clone_made_silent_keeps_no_journal():
+    game = GameState(3)
+    game.play(*game.legal_actions()[0])
+    sim = game.clone()
+    sim.silent = True
+    play_randomly(sim, random.Random(2), 10)
+    assert not sim.can_undo() and game.can_undo()